@@ -0,0 +1,161 @@
+"""HTTP client for the game API used by the Streamlit frontend.
+
+One pooled ``requests.Session`` is reused for every call, so requests ride
+on keep-alive connections instead of opening a new TCP connection each
+time. Read endpoints go through a short-TTL cache keyed by token and
+parameters; writes that change a player's state invalidate that player's
+cached reads. Once an entry expires it is revalidated with its ETag, so an
+unchanged report comes back as a bodyless 304. Responses marked
+``immutable`` stay fresh for their ``max-age``.
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = (3.05, 15)  # (connect, read) seconds
+# The live stream sends a keep-alive every 15 s; allow for a few missed ones
+LIVE_READ_TIMEOUT = 60
+MAX_CACHE_ENTRIES = 1024
+
+
+class ApiClient:
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, pool_size=10, cache_ttl=5.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._cache = OrderedDict()  # key -> (expires, result, etag)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _headers(token):
+        return {'Authorization': f"Bearer {token}"} if token else None
+
+    def _request(self, method, path, token=None, json=None, params=None):
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", json=json,
+                                            params=params, headers=self._headers(token),
+                                            timeout=self.timeout)
+            if response.status_code == 200:
+                return response.json()
+            else:
+                return {'error': f"Error {response.status_code}: {response.text}"}
+        except requests.exceptions.RequestException as e:
+            return {'error': f"Could not connect to server: {e}"}
+
+    def _fresh_for(self, response):
+        cache_control = response.headers.get('Cache-Control', '')
+        max_age = re.search(r'max-age=(\d+)', cache_control)
+        if 'immutable' in cache_control and max_age:
+            return int(max_age.group(1))
+        return self.cache_ttl
+
+    def _cached_get(self, path, token=None, params=None):
+        key = (token, path, tuple(sorted((params or {}).items())))
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit:
+                self._cache.move_to_end(key)
+                if hit[0] > now:
+                    return hit[1]
+        headers = self._headers(token) or {}
+        if hit and hit[2]:
+            headers['If-None-Match'] = hit[2]
+        try:
+            response = self.session.get(f"{self.base_url}{path}", params=params, headers=headers,
+                                        timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            return {'error': f"Could not connect to server: {e}"}
+        if response.status_code == 304 and hit:
+            result, etag = hit[1], hit[2]
+        elif response.status_code == 200:
+            result, etag = response.json(), response.headers.get('ETag')
+        else:
+            return {'error': f"Error {response.status_code}: {response.text}"}
+        with self._lock:
+            self._cache[key] = (now + self._fresh_for(response), result, etag)
+            self._cache.move_to_end(key)
+            if len(self._cache) > MAX_CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+        return result
+
+    def invalidate(self, token=None):
+        """Drop cached reads for ``token``, or everything when None."""
+        with self._lock:
+            if token is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == token]:
+                    del self._cache[key]
+
+    def register(self, username, password):
+        return self._request('POST', '/register', json={'username': username, 'password': password})
+
+    def login(self, username, password):
+        return self._request('POST', '/login', json={'username': username, 'password': password})
+
+    def start_game(self, token):
+        result = self._request('POST', '/start-game', token=token, json={})
+        self.invalidate(token)
+        return result
+
+    def submit_guess(self, token, game_id, guess_word):
+        result = self._request('POST', '/submit-guess', token=token,
+                               json={'game_id': game_id, 'guess_word': guess_word})
+        self.invalidate(token)
+        return result
+
+    def game_status(self, token):
+        return self._cached_get('/game-status', token=token)
+
+    def session_state(self, token):
+        return self._cached_get('/session-state', token=token)
+
+    def daily_report(self, token, report_date):
+        return self._cached_get('/daily-report', token=token, params={'date': report_date})
+
+    def user_report(self, token, username, after=None, limit=50):
+        params = {'username': username, 'limit': limit}
+        if after:
+            params['after'] = after
+        return self._cached_get('/user-report', token=token, params=params)
+
+    def live_stats(self, token):
+        """Yield each event from /live-stats (daily-report shaped) as it arrives.
+
+        Runs until the server closes the stream; yields one ``{'error': ...}``
+        and stops if the request fails.
+        """
+        try:
+            with self.session.get(f"{self.base_url}/live-stats", headers=self._headers(token),
+                                  stream=True, timeout=(self.timeout[0], LIVE_READ_TIMEOUT)) as response:
+                if response.status_code != 200:
+                    yield {'error': f"Error {response.status_code}: {response.text}"}
+                    return
+                data = []
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith('data:'):
+                        data.append(line[5:].lstrip())
+                    elif not line and data:
+                        yield json.loads('\n'.join(data))
+                        data = []
+        except requests.exceptions.RequestException as e:
+            yield {'error': f"Could not connect to server: {e}"}
+
+    def word_stats(self, token, sort='games', order='desc', limit=50):
+        return self._cached_get('/admin/word-stats', token=token,
+                                params={'sort': sort, 'order': order, 'limit': limit})
+
+    def refresh_word_stats(self, token):
+        result = self._request('POST', '/admin/word-stats/refresh', token=token)
+        self.invalidate(token)
+        return result
@@ -1,19 +1,118 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, has_request_context, jsonify, request, stream_with_context
+import click
+import gzip
+import hmac
+import io
+import os
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from sqlalchemy.exc import IntegrityError
-from werkzeug.security import generate_password_hash, check_password_hash
-from collections import Counter
+from werkzeug.security import generate_password_hash
+from sqlalchemy import event, update
+from sqlalchemy.orm import selectinload
+from functools import wraps
+import json
 import random
-from datetime import date
+import time
+from datetime import date, timedelta
+from word_pool import VERSION_SQL as WORD_VERSION_SQL, WordPool, decode_word, encode_word
+from guess_dictionary import GuessDictionary, build_bitset
+from word_import import DEFAULT_CHUNK_SIZE, import_words
+from migrations import run_migrations
+import archive
+import daily_stats
+import http_cache
+import live_stats
+import quota
+import word_stats
+from tokens import InvalidToken, issue_token, verify_token
+from hashing import HashingBusy, PasswordHasher
+import storage
+import metrics
+import ratelimit
+import feedback as fb
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///game.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///game.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLITE_WAL'] = os.environ.get('SQLITE_WAL', '1') == '1'
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = storage.engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'],
+    pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+    max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+    busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'])
+# Batch guess writes from concurrent requests into shared transactions
+app.config['GROUP_COMMIT'] = os.environ.get('GROUP_COMMIT', '0') == '1'
+app.config['GROUP_COMMIT_MAX_BATCH'] = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', 64))
+app.config['GROUP_COMMIT_MAX_DELAY_MS'] = float(os.environ.get('GROUP_COMMIT_MAX_DELAY_MS', 2))
+# Seconds between checks of the word version; imports elsewhere show up within this
+app.config['WORD_POOL_CHECK_SECONDS'] = float(os.environ.get('WORD_POOL_CHECK_SECONDS', 1.0))
+# Hint engine: words x words feedback matrix, memory-mapped from this file
+app.config['FEEDBACK_MATRIX_PATH'] = os.environ.get(
+    'FEEDBACK_MATRIX_PATH', os.path.join(app.instance_path, 'feedback_matrix.npy'))
+app.config['FEEDBACK_MATRIX_MAX_WORDS'] = int(os.environ.get('FEEDBACK_MATRIX_MAX_WORDS', 20000))
+# Games older than ARCHIVE_AFTER_DAYS move to gzip chunks under ARCHIVE_DIR
+app.config['ARCHIVE_DIR'] = os.environ.get(
+    'ARCHIVE_DIR', os.path.join(app.instance_path, 'archive'))
+app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+app.config['ARCHIVE_CHUNK_GAMES'] = int(os.environ.get('ARCHIVE_CHUNK_GAMES', archive.DEFAULT_CHUNK_GAMES))
+# Processes used by the word-stats aggregation job (0 = in-process)
+app.config['WORD_STATS_WORKERS'] = int(os.environ.get('WORD_STATS_WORKERS', 2))
+# Token-bucket limits per route (see ratelimit.DEFAULT_RULES for the format);
+# the sqlite backend shares buckets between workers through RATE_LIMIT_DB
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+app.config['RATE_LIMITS'] = os.environ.get('RATE_LIMITS', ratelimit.DEFAULT_RULES)
+app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+app.config['RATE_LIMIT_DB'] = os.environ.get(
+    'RATE_LIMIT_DB', os.path.join(app.instance_path, 'ratelimit.db'))
+app.config['RATE_LIMIT_MAX_KEYS'] = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100000))
+# /api/live-stats: publish at most once per interval, keep-alive comments every
+# heartbeat, re-read today's daily_stats row every resync seconds (0 = never)
+app.config['LIVE_STATS_INTERVAL'] = float(os.environ.get('LIVE_STATS_INTERVAL', 1.0))
+app.config['LIVE_STATS_HEARTBEAT'] = float(os.environ.get('LIVE_STATS_HEARTBEAT', 15.0))
+app.config['LIVE_STATS_RESYNC'] = float(os.environ.get('LIVE_STATS_RESYNC', 30.0))
+# Compressed report responses kept per worker, keyed by ETag (0 = off)
+app.config['RESPONSE_CACHE_BYTES'] = int(os.environ.get('RESPONSE_CACHE_BYTES', 16 * 1024 * 1024))
+# Opt-in: profile this fraction of requests and log the ones slower than the threshold
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_SLOW_MS'] = float(os.environ.get('PROFILE_SLOW_MS', 250))
+app.config['GUESS_DICTIONARY_PATH'] = os.environ.get(
+    'GUESS_DICTIONARY_PATH', os.path.join(app.instance_path, 'guesses.bitset'))
+# Tokens are signed with this; a well-known fallback is only allowed for local development
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
+if not app.config['SECRET_KEY']:
+    if not (app.debug or os.environ.get('TESTING') == '1' or __name__ == '__main__'):
+        raise RuntimeError('SECRET_KEY is not set. Set it, or use FLASK_DEBUG=1 or TESTING=1 '
+                           'to run with a development key.')
+    app.config['SECRET_KEY'] = 'dev-secret-change-me'
+app.config['TOKEN_TTL_SECONDS'] = int(os.environ.get('TOKEN_TTL_SECONDS', 12 * 3600))
+# Fixed bearer token for metrics scrapers, which can't log in; unset = admins only
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+# Password hashing runs in a process pool; 0 workers hashes inline
+app.config['HASH_WORKERS'] = int(os.environ.get('HASH_WORKERS', 2))
+app.config['HASH_MAX_PENDING'] = int(os.environ.get('HASH_MAX_PENDING', 16))
+app.config['HASH_TIMEOUT'] = float(os.environ.get('HASH_TIMEOUT', 5.0))
 CORS(app)
 
 db = SQLAlchemy(app)
 
+with app.app_context():
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        storage.install_sqlite_pragmas(db.engine,
+                                       wal=app.config['SQLITE_WAL'],
+                                       busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'],
+                                       synchronous=app.config['SQLITE_SYNCHRONOUS'],
+                                       mmap_size=app.config['SQLITE_MMAP_SIZE'])
+    guess_writer = None
+    if app.config['GROUP_COMMIT']:
+        guess_writer = storage.GroupCommitWriter(
+            db.engine,
+            max_batch=app.config['GROUP_COMMIT_MAX_BATCH'],
+            max_delay=app.config['GROUP_COMMIT_MAX_DELAY_MS'] / 1000)
+
 # Models
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -33,21 +132,111 @@ class Game(db.Model):
     target_word = db.Column(db.String(5), nullable=False)
     game_date = db.Column(db.Date, nullable=False)
     won = db.Column(db.Boolean, default=False)
+    guesses_used = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     user = db.relationship('User', backref='games')
+    
+    __table_args__ = (
+        db.Index('ix_game_user_date', 'user_id', 'game_date'),
+        db.Index('ix_game_date_won', 'game_date', 'won'),
+        # Only unfinished games, which can still change on a later day
+        db.Index('ix_game_unfinished', 'user_id', 'game_date', sqlite_where=db.text('completed = 0')),
+    )
 
 class Guess(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
-    guess_word = db.Column(db.String(5), nullable=False)
-    feedback = db.Column(db.String(5), nullable=False)  # e.g., 'GOYGG'
-    guess_number = db.Column(db.Integer, nullable=False)
-    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # Compact rows: clustered on (game_id, guess_number) with no rowid, the
+    # word as its base-26 code and the feedback as its base-3 pattern code
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), primary_key=True)
+    guess_number = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    guess_code = db.Column(db.Integer, nullable=False)  # word_pool.encode_word
+    feedback_code = db.Column(db.Integer, nullable=False)  # 0-242, see feedback.py
+    created_at = db.Column(db.Integer, default=lambda: int(time.time()))  # Unix seconds
     game = db.relationship('Game', backref='guesses')
+    
+    __table_args__ = {'sqlite_with_rowid': False}
+    
+    @property
+    def guess_word(self):
+        return decode_word(self.guess_code)
+    
+    @property
+    def feedback(self):
+        return fb.pattern_labels(self.feedback_code)
+
+class DailyStats(db.Model):
+    __tablename__ = 'daily_stats'
+    stats_date = db.Column(db.Date, primary_key=True)
+    users_active = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    games_started = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    games_won = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    games_lost = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    solved_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    solved_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    solved_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    solved_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    solved_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class DailyQuota(db.Model):
+    __tablename__ = 'daily_quota'
+    user_id = db.Column(db.Integer, primary_key=True)
+    quota_date = db.Column(db.Date, primary_key=True)
+    games_started = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+# Answer words cached in-process; start_game picks from here, not the DB.
+# A cheap version read, throttled, tells it when another process changed them
+word_pool = WordPool(lambda: [row.word for row in db.session.query(Word.word)],
+                     version_loader=lambda: db.session.execute(db.text(WORD_VERSION_SQL)).scalar(),
+                     check_interval=app.config['WORD_POOL_CHECK_SECONDS'])
+
+# Allowed guesses (separate from answers); memory-mapped and shared by workers
+guess_dictionary = GuessDictionary(app.config['GUESS_DICTIONARY_PATH'])
+
+def is_allowed_guess(word):
+    # Answer words imported after the bitset was built are still valid guesses
+    return word in guess_dictionary or word in word_pool
 
-def init_db():
+# Next-guess ranking; shares its matrix file between workers. Opened on
+# first use so importing the app doesn't load numpy or map the file
+feedback_matrix = None
+
+def get_feedback_matrix():
+    global feedback_matrix
+    if feedback_matrix is None:
+        from solver import FeedbackMatrix
+        feedback_matrix = FeedbackMatrix(app.config['FEEDBACK_MATRIX_PATH'])
+    return feedback_matrix
+
+def load_daily_counters(day):
+    stats = db.session.get(DailyStats, day)
+    return {column: getattr(stats, column) if stats else 0
+            for column in daily_stats.COUNTER_COLUMNS}
+
+def _load_live_counters(day):
+    with app.app_context():
+        return load_daily_counters(day)
+
+# Today's counters for /api/live-stats; start_game and submit_guess record
+# into it after they commit
+live_feed = live_stats.LiveStats(_load_live_counters,
+                                 interval=app.config['LIVE_STATS_INTERVAL'],
+                                 heartbeat=app.config['LIVE_STATS_HEARTBEAT'],
+                                 resync=app.config['LIVE_STATS_RESYNC'])
+
+@event.listens_for(Word, 'after_insert')
+@event.listens_for(Word, 'after_delete')
+def _invalidate_word_pool(mapper, connection, target):
+    word_pool.invalidate()
+
+def init_db(log=None):
+    """One-time setup: schema, migrations, seed words and the admin user.
+    
+    Not run on import; use ``flask --app app init`` once per deployment so
+    web workers start without touching the database.
+    """
     with app.app_context():
         db.create_all()
+        run_migrations(db.engine, log=log)
         
         # Insert initial words if empty
         if Word.query.count() == 0:
@@ -56,10 +245,7 @@ def init_db():
                 'PLANT', 'FLASK', 'STORM', 'CLOUD', 'RIVER', 'OCEAN', 'MOUNT', 'PEAKS',
                 'FLAME', 'SPARK', 'BLADE', 'SWORD'
             ]
-            for word in word_list:
-                new_word = Word(word=word.upper())
-                db.session.add(new_word)
-            db.session.commit()
+            import_words(db.session, word_list)
         
         # Create default admin if not exists
         if not User.query.filter_by(username='admin').first():
@@ -68,52 +254,491 @@ def init_db():
             db.session.add(admin)
             db.session.commit()
 
-# Initialize database
-init_db()
+def create_app():
+    """Application factory for WSGI servers, e.g. ``gunicorn 'app:create_app()'``.
+    
+    Warms the word pool with one query. With ``--preload`` that happens
+    once in the master, and forked workers inherit the loaded pool.
+    """
+    with app.app_context():
+        word_pool.warm()
+        # Don't hand pooled SQLite connections down to forked workers
+        db.session.remove()
+        db.engine.dispose()
+    return app
+
+def _read_words(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield line
+
+def load_words(lines, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    stats = import_words(db.session, lines, chunk_size=chunk_size, progress=progress)
+    if stats.inserted:
+        word_pool.invalidate()
+        sync_feedback_matrix()
+    return stats
+
+def sync_feedback_matrix():
+    """Score newly imported words into the matrix, if one has been built.
+    
+    Past FEEDBACK_MATRIX_MAX_WORDS the matrix is left stale and hints
+    answer 503 until it is rebuilt.
+    """
+    matrix = get_feedback_matrix()
+    if matrix.matrix is None or len(word_pool) > app.config['FEEDBACK_MATRIX_MAX_WORDS']:
+        return 0
+    return matrix.sync(word_pool.words(), generation=word_pool.generation)
+
+@app.cli.command('init')
+def init_command():
+    """Create the schema, apply migrations and seed words and the admin user."""
+    init_db(log=click.echo)
+    click.echo('Database initialized')
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations."""
+    applied = run_migrations(db.engine, log=click.echo)
+    if not applied:
+        click.echo('Database is up to date')
+
+@app.cli.command('backfill-daily-stats')
+@click.option('--chunk-size', default=10000, show_default=True)
+def backfill_daily_stats_command(chunk_size):
+    """Rebuild the daily_stats rollups for days that have not been archived."""
+    with db.engine.begin() as conn:
+        after = archive.horizon(conn)
+        days = daily_stats.rebuild(conn, chunk_size=chunk_size, after=after)
+    click.echo(f'Rebuilt rollups for {days} days' + (f' after {after}' if after else ''))
+
+@app.cli.command('word-stats')
+@click.option('--full', is_flag=True,
+              help='Discard aggregates and rescan every game (refused once games are archived).')
+@click.option('--workers', default=None, type=int, help='Defaults to WORD_STATS_WORKERS.')
+@click.option('--chunk-size', default=word_stats.DEFAULT_CHUNK_SIZE, show_default=True)
+def word_stats_command(full, workers, chunk_size):
+    """Aggregate per-word statistics for games finished since the last run."""
+    if workers is None:
+        workers = app.config['WORD_STATS_WORKERS']
+    started = time.perf_counter()
+    try:
+        summary = word_stats.refresh(db.engine, workers=workers, chunk_size=chunk_size, full=full)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Scanned {summary['games_scanned']} games "
+               f"(ids {summary['from_game_id'] + 1}..{summary['to_game_id']}) "
+               f"and {summary['late_games']} finished late "
+               f"in {time.perf_counter() - started:.1f}s")
+
+@app.cli.command('archive-games')
+@click.option('--days', default=None, type=int, help='Defaults to ARCHIVE_AFTER_DAYS.')
+@click.option('--vacuum', is_flag=True, help='VACUUM afterwards to return freed pages to the OS.')
+def archive_games_command(days, vacuum):
+    """Move games older than the horizon into compressed archive chunks."""
+    if days is None:
+        days = app.config['ARCHIVE_AFTER_DAYS']
+    # Count everything in word_stats first; archived games are never rescanned
+    word_stats.refresh(db.engine, workers=app.config['WORD_STATS_WORKERS'])
+    with db.engine.connect() as conn:
+        counted_up_to = word_stats.high_water_mark(conn)
+    
+    totals = archive.archive_games(db.engine, app.config['ARCHIVE_DIR'],
+                                   before=date.today() - timedelta(days=days),
+                                   chunk_games=app.config['ARCHIVE_CHUNK_GAMES'],
+                                   max_game_id=counted_up_to, log=click.echo)
+    click.echo(f"Archived {totals['games']} games and {totals['guesses']} guesses "
+               f"into {totals['chunks']} chunks ({totals['bytes']:,} bytes)")
+    if vacuum and totals['games']:
+        with db.engine.connect() as conn:
+            conn.execute(db.text('VACUUM'))
+
+@app.cli.command('build-feedback-matrix')
+def build_feedback_matrix_command():
+    """Build or incrementally update the hint engine's feedback matrix."""
+    if len(word_pool) > app.config['FEEDBACK_MATRIX_MAX_WORDS']:
+        raise click.ClickException(f"{len(word_pool)} words is more than "
+                                   f"FEEDBACK_MATRIX_MAX_WORDS ({app.config['FEEDBACK_MATRIX_MAX_WORDS']})")
+    started = time.perf_counter()
+    feedback_matrix = get_feedback_matrix()
+    scored = feedback_matrix.sync(word_pool.words(), generation=word_pool.generation)
+    click.echo(f'{len(feedback_matrix.words)} words, {scored} newly scored '
+               f'in {time.perf_counter() - started:.1f}s')
+
+@app.cli.command('import-words')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True)
+def import_words_command(path, chunk_size):
+    """Stream answer words from PATH (one per line) into the Word table."""
+    def report(stats):
+        click.echo(f"{stats.read} read, {stats.inserted} inserted, "
+                   f"{stats.rows_per_second:,.0f} rows/s")
+    
+    stats = load_words(_read_words(path), chunk_size=chunk_size, progress=report)
+    click.echo(f"Done: {stats.as_dict()}")
+
+@app.cli.command('build-guess-dictionary')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True, dir_okay=False))
+def build_guess_dictionary(paths):
+    """Build the allowed-guess bitset from word files plus all answer words."""
+    os.makedirs(os.path.dirname(app.config['GUESS_DICTIONARY_PATH']), exist_ok=True)
+    sources = [_read_words(path) for path in paths]
+    sources.append(word_pool.words())
+    count = build_bitset(app.config['GUESS_DICTIONARY_PATH'], sources)
+    guess_dictionary.reload()
+    click.echo(f"Wrote {count} allowed guesses to {app.config['GUESS_DICTIONARY_PATH']}")
 
 # Helper function
 def get_feedback(secret, guess):
-    feedback = ['gray'] * 5
-    s_count = Counter(secret)
+    return fb.pattern_labels(fb.score(secret, guess))
+
+password_hasher = PasswordHasher(workers=app.config['HASH_WORKERS'],
+                                 max_pending=app.config['HASH_MAX_PENDING'],
+                                 timeout=app.config['HASH_TIMEOUT'])
+
+# Instrumentation: exposed in Prometheus format at /api/metrics
+metrics_registry = metrics.Registry()
+request_latency = metrics_registry.histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    labelnames=('route', 'method', 'status'))
+sql_queries_per_request = metrics_registry.histogram(
+    'sql_queries_per_request', 'SQL statements executed per request',
+    labelnames=('route',), buckets=metrics.COUNT_BUCKETS)
+sql_time_per_request = metrics_registry.histogram(
+    'sql_time_per_request_seconds', 'Total SQL time per request', labelnames=('route',))
+sql_statement_latency = metrics_registry.histogram(
+    'sql_statement_duration_seconds', 'Latency of individual SQL statements')
+password_hash_latency = metrics_registry.histogram(
+    'password_hash_duration_seconds', 'Password hashing time including queueing',
+    labelnames=('operation',))
+profiled_requests = metrics_registry.counter(
+    'profiled_requests_total', 'Sampled requests profiled, by whether they were slow',
+    labelnames=('route', 'slow'))
+rate_limited_requests = metrics_registry.counter(
+    'rate_limited_requests_total', 'Requests refused with 429', labelnames=('route',))
+conditional_requests = metrics_registry.counter(
+    'report_cache_requests_total',
+    'Report responses by outcome: not_modified (304), hit (cached body) or miss',
+    labelnames=('route', 'result'))
+
+def _on_sql_statement(seconds):
+    sql_statement_latency.observe(seconds)
+    if has_request_context() and 'sql_count' in g:
+        g.sql_count += 1
+        g.sql_time += seconds
+
+with app.app_context():
+    metrics.instrument_engine(db.engine, _on_sql_statement)
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+# Per-request timing, reported back in the Server-Timing header
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+    g.timings = []
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.profiler = None
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate and random.random() < rate:
+        g.profiler = metrics.start_profiler()
+
+def record_timing(name, seconds):
+    g.timings.append((name, seconds))
+
+def record_hash(operation, seconds):
+    record_timing('hash', seconds)
+    password_hash_latency.observe(seconds, operation)
+
+@app.after_request
+def _add_server_timing(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    
+    elapsed = time.perf_counter() - started
+    route = _route_label()
+    request_latency.observe(elapsed, route, request.method, str(response.status_code))
+    sql_queries_per_request.observe(g.sql_count, route)
+    sql_time_per_request.observe(g.sql_time, route)
     
-    # Mark greens
-    for i in range(5):
-        if guess[i] == secret[i]:
-            feedback[i] = 'green'
-            s_count[guess[i]] -= 1
+    parts = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in g.timings]
+    parts.append(f'sql;dur={g.sql_time * 1000:.2f};desc="{g.sql_count} queries"')
+    parts.append(f'total;dur={elapsed * 1000:.2f}')
+    response.headers['Server-Timing'] = ', '.join(parts)
     
-    # Mark oranges
-    for i in range(5):
-        if feedback[i] == 'gray' and s_count[guess[i]] > 0:
-            feedback[i] = 'orange'
-            s_count[guess[i]] -= 1
+    if g.profiler is not None:
+        g.profiler.disable()
+        slow = elapsed * 1000 >= app.config['PROFILE_SLOW_MS']
+        profiled_requests.inc(route, str(slow).lower())
+        if slow:
+            app.logger.warning('Slow request %s %s took %.1f ms\n%s', request.method,
+                               request.path, elapsed * 1000, metrics.profile_report(g.profiler))
+        g.profiler = None
     
-    return feedback
+    return response
 
-# Routes
-@app.route('/api/register', methods=['POST'])
-def register():
-    data = request.get_json()
-    username = data.get('username', '').strip()
-    password = data.get('password', '').strip()
+@app.errorhandler(HashingBusy)
+def _hashing_busy(error):
+    response = jsonify({'error': 'Server busy, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def make_rate_limiter(config):
+    """Rate limiter from ``config``, or None when limiting is off."""
+    if not config['RATE_LIMIT_ENABLED']:
+        return None
+    if config['RATE_LIMIT_BACKEND'] == 'sqlite':
+        backend = ratelimit.SQLiteBackend(config['RATE_LIMIT_DB'])
+    else:
+        backend = ratelimit.MemoryBackend(max_keys=config['RATE_LIMIT_MAX_KEYS'])
+    return ratelimit.RateLimiter(backend, ratelimit.parse_rules(config['RATE_LIMITS']))
+
+rate_limiter = make_rate_limiter(app.config)
+
+@app.before_request
+def _apply_rate_limit():
+    if rate_limiter is None:
+        return None
+    
+    claims = current_claims()
+    decision = rate_limiter.check(request.endpoint, request.remote_addr,
+                                  claims.user_id if claims else None)
+    g.rate_limit = decision
+    if decision is None or decision.allowed:
+        return None
+    
+    rate_limited_requests.inc(_route_label())
+    response = jsonify({'error': 'Too many requests, please retry later'})
+    response.status_code = 429
+    response.headers.update(ratelimit.headers(decision))
+    return response
+
+@app.after_request
+def _add_rate_limit_headers(response):
+    decision = g.get('rate_limit')
+    if decision is not None and decision.allowed:
+        response.headers.update(ratelimit.headers(decision))
+    return response
+
+# Auth
+def current_claims():
+    """Decoded claims of the request's bearer token, cached on ``g``."""
+    if 'claims' not in g:
+        g.claims = None
+        header = request.headers.get('Authorization', '')
+        if header.startswith('Bearer '):
+            try:
+                g.claims = verify_token(app.config['SECRET_KEY'].encode(), header[7:].strip())
+            except InvalidToken:
+                pass
+    return g.claims
+
+def require_auth(role=None):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            claims = current_claims()
+            if claims is None:
+                return jsonify({'error': 'Valid token required'}), 401
+            if role is not None and claims.role != role:
+                return jsonify({'error': 'Forbidden'}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def write_guess(conn, game_id, game_date, guess_count, guess_word, pattern,
+                is_correct, game_completed):
+    """Record one guess on ``conn``; False if the game moved on meanwhile.
+    
+    The game row is advanced with a conditional UPDATE on guesses_used, so
+    two concurrent guesses for the same game can't both land.
+    """
+    updated = conn.execute(
+        update(Game.__table__)
+        .where(Game.id == game_id, Game.guesses_used == guess_count)
+        .values(guesses_used=guess_count + 1, won=is_correct, completed=game_completed)
+    ).rowcount
+    if not updated:
+        return False
+    conn.execute(Guess.__table__.insert().values(
+        game_id=game_id,
+        guess_number=guess_count + 1,
+        guess_code=encode_word(guess_word),
+        feedback_code=pattern,
+        created_at=int(time.time())
+    ))
+    if game_completed:
+        daily_stats.bump(conn, game_date,
+                         **daily_stats.completion_increments(is_correct, guess_count + 1))
+    return True
+
+# Upper bound on pairs accepted by /api/score-batch in one call
+MAX_SCORE_BATCH = 100000
+
+# user-report paging: largest page a client may ask for, and the page size
+# used internally while streaming NDJSON
+MAX_REPORT_PAGE = 500
+REPORT_STREAM_PAGE = 200
+
+def user_report_page(user_id, after=None, limit=None, detail='summary', include_archive=False):
+    """One page of a user's per-day report, newest first.
+
+    Keyset pagination on game_date: ``after`` is the last date of the
+    previous page and only earlier days are returned. With
+    ``detail='games'`` each day also carries its games and their guesses,
+    loaded with one extra IN query rather than one per game. With
+    ``include_archive`` archived days are merged in as well.
+    """
+    query = db.session.query(
+        Game.game_date,
+        db.func.count(Game.id).label('words_tried'),
+        db.func.sum(Game.won, type_=db.Integer).label('correct_guesses')
+    ).filter(Game.user_id == user_id)
+    
+    if after is not None:
+        query = query.filter(Game.game_date < after)
+    
+    query = query.group_by(Game.game_date).order_by(Game.game_date.desc())
     
+    if limit is not None:
+        query = query.limit(limit)
+    
+    rows = [{
+        'date': row.game_date.isoformat(),
+        'words_tried': row.words_tried,
+        'correct_guesses': row.correct_guesses or 0
+    } for row in query]
+    
+    if include_archive:
+        archived = db.session.execute(db.text(archive.summary_sql(after, limit)),
+                                      archive.summary_params(user_id, after, limit))
+        rows = archive.merge_summaries(rows, archived, limit)
+    
+    if detail == 'games' and rows:
+        games = Game.query.options(selectinload(Game.guesses))\
+            .filter(Game.user_id == user_id,
+                    Game.game_date <= date.fromisoformat(rows[0]['date']),
+                    Game.game_date >= date.fromisoformat(rows[-1]['date']))\
+            .order_by(Game.id)
+        by_date = {row['date']: row for row in rows}
+        for row in rows:
+            row['games'] = []
+        for game in games:
+            by_date[game.game_date.isoformat()]['games'].append({
+                'game_id': game.id,
+                'target_word': game.target_word,
+                'won': bool(game.won),
+                'guesses_used': game.guesses_used,
+                'guesses': [{
+                    'guess_number': g.guess_number,
+                    'guess_word': g.guess_word,
+                    'feedback': g.feedback
+                } for g in sorted(game.guesses, key=lambda g: g.guess_number)]
+            })
+        
+        if include_archive:
+            span = {'user_id': user_id, 'first_date': rows[-1]['date'], 'last_date': rows[0]['date']}
+            paths = [path for _, path in db.session.execute(db.text(archive.CHUNK_PATHS_SQL), span)]
+            archive.attach_games(rows, archive.read_games(app.config['ARCHIVE_DIR'], paths, user_id,
+                                                          span['first_date'], span['last_date']))
+    
+    return rows
+
+response_cache = (http_cache.ResponseCache(app.config['RESPONSE_CACHE_BYTES'])
+                  if app.config['RESPONSE_CACHE_BYTES'] else None)
+
+def conditional_json(etag, immutable, build):
+    """JSON response for ``build()`` tagged with ``etag``.
+    
+    Answers 304 when the client already has the representation it would
+    get, and serves a cached (gzip) body when there is one, so ``build``
+    only runs on a miss. The gzip body goes out under ``gzip_etag(etag)``.
+    """
+    route = _route_label()
+    send_gzip = (response_cache is not None
+                 and http_cache.accepts_gzip(request.headers.get('Accept-Encoding')))
+    headers = {'ETag': http_cache.gzip_etag(etag) if send_gzip else etag, 'Vary': 'Accept-Encoding',
+               'Cache-Control': http_cache.IMMUTABLE if immutable else http_cache.REVALIDATE}
+    if http_cache.not_modified(request.headers.get('If-None-Match'), headers['ETag']):
+        conditional_requests.inc(route, 'not_modified')
+        return Response(status=304, headers=headers)
+    
+    compressed = response_cache.get(etag) if response_cache is not None else None
+    conditional_requests.inc(route, 'miss' if compressed is None else 'hit')
+    if compressed is None:
+        body = jsonify(build()).get_data()
+        if response_cache is None:
+            return Response(body, mimetype='application/json', headers=headers)
+        compressed = response_cache.put(etag, body)
+    
+    if send_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(compressed, mimetype='application/json', headers=headers)
+    return Response(gzip.decompress(compressed), mimetype='application/json', headers=headers)
+
+# Request validation shared with the ASGI server
+def registration_error(username, password):
     if len(username) < 5 or not username.isalpha():
-        return jsonify({'error': 'Username must be at least 5 letters (A-Z, a-z only)'}), 400
+        return 'Username must be at least 5 letters (A-Z, a-z only)'
     
     if len(password) < 5:
-        return jsonify({'error': 'Password must be at least 5 characters'}), 400
+        return 'Password must be at least 5 characters'
     
     if not any(c.isalpha() for c in password):
-        return jsonify({'error': 'Password must contain at least one letter'}), 400
+        return 'Password must contain at least one letter'
     
     if not any(c.isdigit() for c in password):
-        return jsonify({'error': 'Password must contain at least one digit'}), 400
+        return 'Password must contain at least one digit'
     
     if not any(c in '$%*@' for c in password):
-        return jsonify({'error': 'Password must contain at least one special character ($, %, *, @)'}), 400
+        return 'Password must contain at least one special character ($, %, *, @)'
+    
+    return None
+
+def user_report_args(args):
+    """Parse user-report query args; returns (options, error message)."""
+    detail = args.get('detail', 'summary')
+    if detail not in ('summary', 'games'):
+        return None, 'detail must be summary or games'
+    
+    after = args.get('after')
+    if after is not None:
+        try:
+            after = date.fromisoformat(after)
+        except ValueError:
+            return None, 'Invalid after cursor. Use YYYY-MM-DD'
+    
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return None, 'Invalid limit'
+        if not 1 <= limit <= MAX_REPORT_PAGE:
+            return None, f'limit must be between 1 and {MAX_REPORT_PAGE}'
+    
+    return {'detail': detail, 'after': after, 'limit': limit,
+            'ndjson': args.get('format') == 'ndjson',
+            'include_archive': args.get('include_archive') in ('1', 'true')}, None
+
+# Routes
+@app.route('/api/register', methods=['POST'])
+def register():
+    data = request.get_json()
+    username = data.get('username', '').strip()
+    password = data.get('password', '').strip()
+    
+    error = registration_error(username, password)
+    if error:
+        return jsonify({'error': error}), 400
     
     try:
-        hashed_pw = generate_password_hash(password)
+        hashed_pw, hash_seconds = password_hasher.hash(password)
+        record_hash('hash', hash_seconds)
         new_user = User(username=username, password=hashed_pw)
         db.session.add(new_user)
         db.session.commit()
@@ -130,47 +755,51 @@ def login():
     
     user = User.query.filter_by(username=username).first()
     
-    if user and check_password_hash(user.password, password):
+    password_ok = False
+    if user:
+        password_ok, hash_seconds = password_hasher.check(user.password, password)
+        record_hash('check', hash_seconds)
+    
+    if password_ok:
+        token, expires = issue_token(app.config['SECRET_KEY'].encode(), user.id, user.role,
+                                     app.config['TOKEN_TTL_SECONDS'])
         return jsonify({
             'message': 'Login successful',
             'user_id': user.id,
             'username': username,
-            'role': user.role
+            'role': user.role,
+            'token': token,
+            'expires_at': expires
         })
     
     return jsonify({'error': 'Invalid username or password'}), 401
 
 @app.route('/api/start-game', methods=['POST'])
+@require_auth()
 def start_game():
-    data = request.get_json()
-    user_id = data.get('user_id')
-    
-    if not user_id:
-        return jsonify({'error': 'User  ID required'}), 400
-    
-    try:
-        user_id = int(user_id)
-    except ValueError:
-        return jsonify({'error': 'Invalid user ID'}), 400
+    user_id = current_claims().user_id
     
     today = date.today()  # Use date object, not isoformat() string
     
-    # Check daily limit
-    games_today = Game.query.filter_by(user_id=user_id, game_date=today).count()
-    
-    if games_today >= 3:
-        return jsonify({'error': 'Daily limit reached (3 games per day)'}), 400
-    
     # Get random word
-    all_words = Word.query.all()
-    if not all_words:
+    target_word = word_pool.random_word()
+    if target_word is None:
         return jsonify({'error': 'No words available'}), 500
-    target_word = random.choice(all_words).word
+    
+    # Check and take the daily limit in one statement
+    game_number = quota.reserve(db.session, user_id, today)
+    
+    if game_number is None:
+        db.session.rollback()
+        return jsonify({'error': 'Daily limit reached (3 games per day)'}), 400
     
     # Create game
     new_game = Game(user_id=user_id, target_word=target_word, game_date=today)
     db.session.add(new_game)
+    increments = {'games_started': 1, 'users_active': int(game_number == 1)}
+    daily_stats.bump(db.session, today, **increments)
     db.session.commit()
+    live_feed.record(today, **increments)
     
     return jsonify({
         'game_id': new_game.id,
@@ -179,69 +808,171 @@ def start_game():
     })
 
 @app.route('/api/submit-guess', methods=['POST'])
+@require_auth()
 def submit_guess():
     data = request.get_json()
     game_id = data.get('game_id')
     guess_word = data.get('guess_word', '').strip().upper()
-    user_id = data.get('user_id')
+    user_id = current_claims().user_id
     
-    if not game_id or not guess_word or not user_id:
+    if not game_id or not guess_word:
         return jsonify({'error': 'Missing required fields'}), 400
     
     try:
         game_id = int(game_id)
-        user_id = int(user_id)
     except ValueError:
-        return jsonify({'error': 'Invalid game ID or user ID'}), 400
+        return jsonify({'error': 'Invalid game ID'}), 400
     
-    if len(guess_word) != 5 or not guess_word.isalpha():
+    if len(guess_word) != 5 or not guess_word.isascii() or not guess_word.isalpha():
         return jsonify({'error': 'Guess must be exactly 5 uppercase letters'}), 400
     
-    game = Game.query.filter_by(id=game_id, user_id=user_id).first()
+    if not is_allowed_guess(guess_word):
+        return jsonify({'error': 'Not in word list'}), 400
     
-    if not game:
+    # Single primary-key read; progress lives on the game row itself
+    game = db.session.get(Game, game_id)
+    
+    if not game or game.user_id != user_id:
         return jsonify({'error': 'Game not found'}), 404
     
     if game.won:
         return jsonify({'error': 'Game already completed'}), 400
     
-    # Get current guess count
-    guess_count = Guess.query.filter_by(game_id=game_id).count()
+    guess_count = game.guesses_used
+    game_date = game.game_date
     
     if guess_count >= 5:
         return jsonify({'error': 'Maximum guesses reached'}), 400
     
     # Calculate feedback
-    feedback = get_feedback(game.target_word, guess_word)
-    feedback_str = ''.join(['G' if f == 'green' else 'O' if f == 'orange' else 'Y' for f in feedback])
-    
-    # Save guess
-    new_guess = Guess(
-        game_id=game_id,
-        guess_word=guess_word,
-        feedback=feedback_str,
-        guess_number=guess_count + 1
-    )
-    db.session.add(new_guess)
+    pattern = fb.score(game.target_word, guess_word)
+    feedback = fb.pattern_labels(pattern)
     
     # Check if game is won
     is_correct = guess_word == game.target_word
     remaining_guesses = 4 - guess_count
+    game_completed = is_correct or (guess_count + 1 == 5)
     
     if is_correct:
-        game.won = True
         remaining_guesses = 0
     
-    db.session.commit()
+    write_args = (game_id, game_date, guess_count, guess_word, pattern,
+                  is_correct, game_completed)
+    
+    if guess_writer is not None:
+        # End our read transaction before waiting on the shared writer
+        db.session.rollback()
+        recorded = guess_writer.submit(lambda conn: write_guess(conn, *write_args))
+    else:
+        recorded = write_guess(db.session.connection(), *write_args)
+        if recorded:
+            db.session.commit()
+        else:
+            db.session.rollback()
+    
+    if not recorded:
+        return jsonify({'error': 'Another guess for this game is in progress, please retry'}), 409
+    
+    if game_completed:
+        live_feed.record(game_date, **daily_stats.completion_increments(is_correct, guess_count + 1))
     
     return jsonify({
         'feedback': feedback,
         'is_correct': is_correct,
         'remaining_guesses': remaining_guesses,
-        'game_completed': is_correct or (guess_count + 1 == 5)
+        'game_completed': game_completed
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    scrape_token = app.config['METRICS_TOKEN']
+    header = request.headers.get('Authorization', '')
+    if not (scrape_token and hmac.compare_digest(header.encode(), f'Bearer {scrape_token}'.encode())):
+        claims = current_claims()
+        if claims is None:
+            return jsonify({'error': 'Valid token required'}), 401
+        if claims.role != 'admin':
+            return jsonify({'error': 'Forbidden'}), 403
+    return Response(metrics_registry.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/score-batch', methods=['POST'])
+@require_auth(role='admin')
+def score_batch():
+    data = request.get_json()
+    pairs = data.get('pairs')
+    
+    if not isinstance(pairs, list) or not pairs:
+        return jsonify({'error': 'pairs must be a non-empty list of [secret, guess]'}), 400
+    
+    if len(pairs) > MAX_SCORE_BATCH:
+        return jsonify({'error': f'At most {MAX_SCORE_BATCH} pairs per request'}), 400
+    
+    secrets, guesses = [], []
+    for pair in pairs:
+        if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+            return jsonify({'error': 'Each pair must be [secret, guess]'}), 400
+        secret, guess = str(pair[0]).strip().upper(), str(pair[1]).strip().upper()
+        if len(secret) != 5 or len(guess) != 5 or not (secret + guess).isascii() or not (secret + guess).isalpha():
+            return jsonify({'error': f'Invalid pair: {pair}'}), 400
+        secrets.append(secret)
+        guesses.append(guess)
+    
+    patterns = fb.score_batch(secrets, guesses)
+    
+    return jsonify({
+        'count': len(pairs),
+        'feedback': [fb.PATTERN_STRINGS[p] for p in patterns.tolist()]
+    })
+
+@app.route('/api/admin/import-words', methods=['POST'])
+@require_auth(role='admin')
+def admin_import_words():
+    try:
+        chunk_size = int(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Invalid chunk_size'}), 400
+    
+    if chunk_size < 1:
+        return jsonify({'error': 'Invalid chunk_size'}), 400
+    
+    # Read the body as a stream (one word per line) rather than buffering it
+    lines = io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace')
+    stats = load_words(lines, chunk_size=chunk_size)
+    
+    return jsonify(stats.as_dict())
+
+@app.route('/api/admin/word-stats', methods=['GET'])
+@require_auth(role='admin')
+def admin_word_stats():
+    sort = request.args.get('sort', 'games')
+    if sort not in ('games', 'win_rate', 'avg_guesses', 'word'):
+        return jsonify({'error': 'sort must be one of games, win_rate, avg_guesses, word'}), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), MAX_REPORT_PAGE)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    descending = request.args.get('order', 'desc') != 'asc'
+    word = request.args.get('word', '').strip().upper() or None
+    
+    return jsonify(word_stats.report(db.session.connection(), sort=sort, descending=descending,
+                                     limit=limit, word=word))
+
+@app.route('/api/admin/word-stats/refresh', methods=['POST'])
+@require_auth(role='admin')
+def admin_refresh_word_stats():
+    # End our read transaction; the job commits through its own connections
+    db.session.rollback()
+    try:
+        summary = word_stats.refresh(db.engine, workers=app.config['WORD_STATS_WORKERS'],
+                                     full=request.args.get('full') == '1')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify(summary)
+
 @app.route('/api/daily-report', methods=['GET'])
+@require_auth(role='admin')
 def daily_report():
     report_date_str = request.args.get('date', date.today().isoformat())
     
@@ -250,17 +981,21 @@ def daily_report():
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
-    num_users = db.session.query(Game.user_id).filter(Game.game_date == report_date).distinct().count()
-    
-    num_correct = Game.query.filter(Game.game_date == report_date, Game.won == True).count()
-    
-    return jsonify({
-        'date': report_date.isoformat(),  # Serialize back to string for JSON
-        'num_users': num_users,
-        'num_correct': num_correct
-    })
+    counters = load_daily_counters(report_date)
+    etag = http_cache.make_etag('daily-report', report_date, counters)
+    return conditional_json(etag, http_cache.day_is_closed(report_date, date.today(), counters),
+                            lambda: daily_stats.report(report_date, counters))
+
+@app.route('/api/live-stats', methods=['GET'])
+@require_auth(role='admin')
+def live_stats_stream():
+    # Counters come from memory; don't hold a pooled connection while streaming
+    db.session.remove()
+    return Response(live_feed.stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/user-report', methods=['GET'])
+@require_auth(role='admin')
 def user_report():
     username = request.args.get('username')
     
@@ -272,48 +1007,190 @@ def user_report():
     if not user:
         return jsonify({'error': 'User  not found'}), 404
     
-    results = db.session.query(
-        Game.game_date,
-        db.func.count(Game.id).label('words_tried'),
-        db.func.sum(Game.won).label('correct_guesses')
-    ).filter(Game.user_id == user.id)\
-     .group_by(Game.game_date)\
-     .order_by(Game.game_date.desc())\
-     .all()
+    options, error = user_report_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
     
-    report_data = []
-    for row in results:
-        report_data.append({
-            'date': row.game_date.isoformat(),
-            'words_tried': row.words_tried,
-            'correct_guesses': row.correct_guesses or 0
-        })
+    detail, after, limit = options['detail'], options['after'], options['limit']
+    include_archive = options['include_archive']
     
-    return jsonify({
-        'username': username,
-        'report': report_data
-    })
+    if options['ndjson']:
+        return Response(stream_with_context(
+            _stream_user_report(user.id, after, limit, detail, include_archive)),
+            mimetype='application/x-ndjson')
+    
+    today = date.today()
+    active_games = db.session.execute(
+        db.text(http_cache.USER_ACTIVE_SQL),
+        {'user_id': user.id, 'open_from': http_cache.open_from(today).isoformat()}).all()
+    closed, active = http_cache.user_page_state(after, today, active_games)
+    archive_generation = None
+    if not (closed and include_archive):
+        archive_generation = db.session.execute(db.text(http_cache.ARCHIVE_GENERATION_SQL)).scalar()
+    etag = http_cache.make_etag('user-report', user.id, detail, after, limit, include_archive,
+                                archive_generation, active)
+    
+    def build():
+        if limit is None:
+            report_data = user_report_page(user.id, after=after, detail=detail,
+                                           include_archive=include_archive)
+            next_cursor = None
+        else:
+            # Fetch one extra day to learn whether another page exists
+            report_data = user_report_page(user.id, after=after, limit=limit + 1, detail=detail,
+                                           include_archive=include_archive)
+            next_cursor = None
+            if len(report_data) > limit:
+                report_data = report_data[:limit]
+                next_cursor = report_data[-1]['date']
+        
+        return {
+            'username': username,
+            'report': report_data,
+            'next_cursor': next_cursor
+        }
+    
+    return conditional_json(etag, closed and include_archive, build)
+
+def _stream_user_report(user_id, after, limit, detail, include_archive=False):
+    # One JSON object per line, fetched page by page so memory stays flat
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_size = REPORT_STREAM_PAGE if remaining is None else min(remaining, REPORT_STREAM_PAGE)
+        rows = user_report_page(user_id, after=after, limit=page_size, detail=detail,
+                                include_archive=include_archive)
+        for row in rows:
+            yield json.dumps(row) + '\n'
+        if len(rows) < page_size:
+            break
+        after = date.fromisoformat(rows[-1]['date'])
+        if remaining is not None:
+            remaining -= len(rows)
 
 @app.route('/api/game-status', methods=['GET'])
+@require_auth()
 def game_status():
-    user_id = request.args.get('user_id')
-    
-    if not user_id:
-        return jsonify({'error': 'User  ID required'}), 400
-    
-    try:
-        user_id = int(user_id)
-    except ValueError:
-        return jsonify({'error': 'Invalid user ID'}), 400
+    user_id = current_claims().user_id
     
     today = date.today()  # Use date object, not isoformat() string
     
-    games_today = Game.query.filter_by(user_id=user_id, game_date=today).count()
+    games_today = quota.used(db.session, user_id, today)
     
     return jsonify({
         'games_played_today': games_today,
-        'games_remaining': max(0, 3 - games_today)
+        'games_remaining': quota.remaining(games_today)
+    })
+
+@app.route('/api/session-state', methods=['GET'])
+@require_auth()
+def session_state():
+    user_id = current_claims().user_id
+    today = date.today()
+    
+    # Today's games with their guesses in one query, served by the
+    # (user_id, game_date) and (game_id, guess_number) indexes
+    rows = db.session.query(
+        Game.id, Game.target_word, Game.won, Game.completed, Game.guesses_used,
+        Guess.guess_code, Guess.feedback_code
+    ).outerjoin(Guess, Guess.game_id == Game.id)\
+     .filter(Game.user_id == user_id, Game.game_date == today)\
+     .order_by(Game.id, Guess.guess_number)\
+     .all()
+    
+    games = {}
+    for row in rows:
+        game = games.get(row.id)
+        if game is None:
+            game = games[row.id] = {
+                'game_id': row.id,
+                'target_word': row.target_word,
+                'won': bool(row.won),
+                'completed': bool(row.completed),
+                'remaining_guesses': 0 if row.won else 5 - row.guesses_used,
+                'guesses': []
+            }
+        if row.guess_code is not None:
+            game['guesses'].append({
+                'guess_word': decode_word(row.guess_code),
+                'feedback': fb.pattern_labels(row.feedback_code)
+            })
+    
+    active_game = None
+    last_completed_game = None
+    for game in games.values():
+        if game['completed']:
+            last_completed_game = game
+        else:
+            active_game = game
+    
+    return jsonify({
+        'games_played_today': len(games),
+        'games_remaining': quota.remaining(len(games)),
+        'active_game': active_game,
+        'last_completed_game': last_completed_game
+    })
+
+def _hint_response(history, top, target=None):
+    # Serve whatever matrix is on disk; build-feedback-matrix and word imports
+    # keep it current. One built for another answer list would rank wrongly
+    from solver import StaleMatrixError
+    try:
+        suggestions, candidates = get_feedback_matrix().rank(
+            history, top=top, word_count=len(word_pool), target=target)
+    except StaleMatrixError:
+        return jsonify({'error': 'Hints are unavailable until the feedback matrix is rebuilt'}), 503
+    except LookupError:
+        return jsonify({'error': 'Hints are unavailable until the feedback matrix is built'}), 503
+    return jsonify({
+        'remaining_candidates': len(candidates),
+        'candidates': candidates if len(candidates) <= 10 else None,
+        'suggestions': suggestions
     })
 
+def _hint_top():
+    try:
+        return min(max(int(request.args.get('top', 5)), 1), 50)
+    except ValueError:
+        return 5
+
+@app.route('/api/hint', methods=['GET'])
+@require_auth()
+def hint():
+    try:
+        game_id = int(request.args.get('game_id', ''))
+    except ValueError:
+        return jsonify({'error': 'Invalid game ID'}), 400
+    
+    game = db.session.get(Game, game_id)
+    
+    if not game or game.user_id != current_claims().user_id:
+        return jsonify({'error': 'Game not found'}), 404
+    
+    if game.completed:
+        return jsonify({'error': 'Game already completed'}), 400
+    
+    guesses = Guess.query.filter_by(game_id=game_id).order_by(Guess.guess_number).all()
+    history = [(g.guess_word, g.feedback_code) for g in guesses]
+    
+    return _hint_response(history, _hint_top(), target=game.target_word)
+
+@app.route('/api/solver/analyze', methods=['POST'])
+@require_auth(role='admin')
+def solver_analyze():
+    data = request.get_json()
+    guesses = data.get('guesses', [])
+    
+    history = []
+    for item in guesses:
+        if not isinstance(item, (list, tuple)) or len(item) != 2:
+            return jsonify({'error': 'Each guess must be [word, feedback]'}), 400
+        word, feedback_str = str(item[0]).strip().upper(), str(item[1]).strip().upper()
+        if not is_allowed_guess(word) or feedback_str not in fb.PATTERN_STRINGS:
+            return jsonify({'error': f'Invalid guess: {item}'}), 400
+        history.append((word, fb.pattern_from_string(feedback_str)))
+    
+    return _hint_response(history, _hint_top())
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    init_db()
+    create_app().run(debug=True, port=5000)
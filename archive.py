@@ -0,0 +1,246 @@
+"""Moves old games and their guesses out of the hot tables into gzip files.
+
+``archive_games`` takes games played before a cutoff date, oldest first,
+``chunk_games`` at a time. Each chunk is written as one gzip NDJSON file
+(one game per line, guesses embedded). The same transaction records the
+file in ``archive_chunk``, adds per-(user, day) counts to
+``archive_index`` and deletes the rows from ``game`` and ``guess``. A
+crash can at worst leave an unreferenced file behind, never a game in both
+places or neither.
+
+Summary reports come straight from ``archive_index``. Only per-game
+detail opens the files, and then only the chunks the index points at.
+The ``*_SQL`` strings use plain :named parameters so sqlite3/aiosqlite can
+run them too.
+"""
+import gzip
+import json
+import os
+
+from sqlalchemy import bindparam, text
+
+import feedback as fb
+from word_pool import decode_word
+
+DEFAULT_CHUNK_GAMES = 5000
+
+CREATE_SQL = [
+    text("CREATE TABLE IF NOT EXISTS archive_chunk ("
+         "id INTEGER NOT NULL PRIMARY KEY, "
+         "path VARCHAR(255) NOT NULL UNIQUE, "
+         "first_date DATE NOT NULL, "
+         "last_date DATE NOT NULL, "
+         "games INTEGER NOT NULL, "
+         "guesses INTEGER NOT NULL, "
+         "bytes INTEGER NOT NULL, "
+         "created_at DATETIME DEFAULT CURRENT_TIMESTAMP)"),
+    text("CREATE TABLE IF NOT EXISTS archive_index ("
+         "user_id INTEGER NOT NULL, "
+         "game_date DATE NOT NULL, "
+         "chunk_id INTEGER NOT NULL REFERENCES archive_chunk (id), "
+         "games INTEGER NOT NULL, "
+         "won INTEGER NOT NULL, "
+         "PRIMARY KEY (user_id, game_date, chunk_id))"),
+]
+
+_SELECT_GAMES_SQL = text(
+    "SELECT id, user_id, target_word, game_date, won, completed, guesses_used, created_at "
+    "FROM game WHERE game_date < :before AND id <= :max_id "
+    "ORDER BY game_date, id LIMIT :limit")
+
+_SELECT_GUESSES_SQL = text(
+    "SELECT game_id, guess_number, guess_code, feedback_code, created_at FROM guess "
+    "WHERE game_id IN :ids ORDER BY game_id, guess_number"
+).bindparams(bindparam('ids', expanding=True))
+
+_INSERT_CHUNK_SQL = text(
+    "INSERT INTO archive_chunk (path, first_date, last_date, games, guesses, bytes) "
+    "VALUES (:path, :first_date, :last_date, :games, :guesses, :bytes)")
+
+_INSERT_INDEX_SQL = text(
+    "INSERT INTO archive_index (user_id, game_date, chunk_id, games, won) "
+    "VALUES (:user_id, :game_date, :chunk_id, :games, :won)")
+
+_DELETE_GUESSES_SQL = text(
+    "DELETE FROM guess WHERE game_id IN :ids").bindparams(bindparam('ids', expanding=True))
+
+_DELETE_GAMES_SQL = text(
+    "DELETE FROM game WHERE id IN :ids").bindparams(bindparam('ids', expanding=True))
+
+# Newest game date in any chunk. Games after it are all hot; games on or
+# before it may be too, e.g. ones past max_game_id when that run happened
+HORIZON_SQL = "SELECT MAX(last_date) FROM archive_chunk"
+
+
+def horizon(conn):
+    """Date of the newest archived game (ISO string), or None if nothing is archived."""
+    return conn.execute(text(HORIZON_SQL)).scalar()
+
+
+CHUNK_PATHS_SQL = (
+    "SELECT DISTINCT archive_chunk.id, archive_chunk.path FROM archive_index "
+    "JOIN archive_chunk ON archive_chunk.id = archive_index.chunk_id "
+    "WHERE archive_index.user_id = :user_id "
+    "AND archive_index.game_date >= :first_date AND archive_index.game_date <= :last_date "
+    "ORDER BY archive_chunk.id")
+
+
+def summary_sql(after=None, limit=None):
+    """Per-day (game_date, games, won) for :user_id, newest first."""
+    return ("SELECT game_date, SUM(games), SUM(won) FROM archive_index WHERE user_id = :user_id"
+            + (" AND game_date < :after" if after is not None else "")
+            + " GROUP BY game_date ORDER BY game_date DESC"
+            + (" LIMIT :limit" if limit is not None else ""))
+
+
+def summary_params(user_id, after=None, limit=None):
+    params = {'user_id': user_id}
+    if after is not None:
+        params['after'] = after.isoformat()
+    if limit is not None:
+        params['limit'] = limit
+    return params
+
+
+def merge_summaries(hot_rows, archived_rows, limit=None):
+    """Merge hot and archived report rows (newest first) into one page.
+
+    Both inputs are already limited, so the top ``limit`` days of their
+    union are exactly the page. Days present in both are summed.
+    """
+    by_date = {}
+    for row in list(hot_rows) + [{'date': str(d), 'words_tried': games, 'correct_guesses': won or 0}
+                                 for d, games, won in archived_rows]:
+        merged = by_date.get(row['date'])
+        if merged is None:
+            by_date[row['date']] = dict(row)
+        else:
+            merged['words_tried'] += row['words_tried']
+            merged['correct_guesses'] += row['correct_guesses']
+    rows = sorted(by_date.values(), key=lambda row: row['date'], reverse=True)
+    return rows if limit is None else rows[:limit]
+
+
+def _to_iso(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _write_chunk(path, games, guesses_by_game):
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as out:
+        for game in games:
+            out.write(json.dumps({
+                'id': game.id,
+                'user_id': game.user_id,
+                'target_word': game.target_word,
+                'game_date': _to_iso(game.game_date),
+                'won': bool(game.won),
+                'completed': bool(game.completed),
+                'guesses_used': game.guesses_used,
+                'created_at': _to_iso(game.created_at),
+                'guesses': guesses_by_game.get(game.id, [])
+            }, separators=(',', ':')) + '\n')
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def archive_games(engine, archive_dir, before, chunk_games=DEFAULT_CHUNK_GAMES,
+                  max_game_id=None, log=None):
+    """Archive games dated before ``before``; returns totals.
+
+    ``max_game_id`` keeps newer games in place, e.g. ones a rollup job
+    hasn't counted yet.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    totals = {'chunks': 0, 'games': 0, 'guesses': 0, 'bytes': 0}
+    params = {'before': before.isoformat(),
+              'max_id': max_game_id if max_game_id is not None else 2 ** 63 - 1,
+              'limit': chunk_games}
+    while True:
+        with engine.connect() as conn:
+            # Explicit BEGIN: the driver would otherwise only start the
+            # transaction at the first write, so a guess committed between
+            # the reads and the deletes would be deleted without being archived
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+            games = conn.execute(_SELECT_GAMES_SQL, params).all()
+            if not games:
+                conn.rollback()
+                break
+            ids = [game.id for game in games]
+
+            guesses_by_game = {}
+            guess_count = 0
+            # Chunk files keep words and 'GOYGG' strings, whatever the table stores
+            for game_id, number, guess_code, feedback_code, created_at in conn.execute(
+                    _SELECT_GUESSES_SQL, {'ids': ids}):
+                guesses_by_game.setdefault(game_id, []).append(
+                    [number, decode_word(guess_code), fb.pattern_string(feedback_code), created_at])
+                guess_count += 1
+
+            first_date, last_date = _to_iso(games[0].game_date), _to_iso(games[-1].game_date)
+            name = f'games-{first_date}-{games[0].id}.ndjson.gz'
+            size = _write_chunk(os.path.join(archive_dir, name), games, guesses_by_game)
+
+            chunk_id = conn.execute(_INSERT_CHUNK_SQL, {
+                'path': name, 'first_date': first_date, 'last_date': last_date,
+                'games': len(games), 'guesses': guess_count, 'bytes': size}).lastrowid
+            index = {}
+            for game in games:
+                entry = index.setdefault((game.user_id, _to_iso(game.game_date)), [0, 0])
+                entry[0] += 1
+                entry[1] += int(bool(game.won))
+            conn.execute(_INSERT_INDEX_SQL, [
+                {'user_id': user_id, 'game_date': day, 'chunk_id': chunk_id,
+                 'games': n, 'won': won}
+                for (user_id, day), (n, won) in index.items()])
+            conn.execute(_DELETE_GUESSES_SQL, {'ids': ids})
+            conn.execute(_DELETE_GAMES_SQL, {'ids': ids})
+            conn.commit()
+
+        totals['chunks'] += 1
+        totals['games'] += len(games)
+        totals['guesses'] += guess_count
+        totals['bytes'] += size
+        if log is not None:
+            log(f'{name}: {len(games)} games, {guess_count} guesses, {size:,} bytes')
+    return totals
+
+
+def read_games(archive_dir, paths, user_id, first_date, last_date):
+    """Archived games for ``user_id`` in [first_date, last_date], API shaped.
+
+    ``paths`` come from CHUNK_PATHS_SQL; each file is streamed line by line.
+    """
+    first_date, last_date = _to_iso(first_date), _to_iso(last_date)
+    games = []
+    for path in paths:
+        with gzip.open(os.path.join(archive_dir, path), 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                game = json.loads(line)
+                if game['user_id'] != user_id or not first_date <= game['game_date'] <= last_date:
+                    continue
+                games.append({
+                    'game_date': game['game_date'],
+                    'game_id': game['id'],
+                    'target_word': game['target_word'],
+                    'won': game['won'],
+                    'guesses_used': game['guesses_used'],
+                    'guesses': [{
+                        'guess_number': number,
+                        'guess_word': word,
+                        'feedback': fb.pattern_labels(fb.pattern_from_string(feedback_str))
+                    } for number, word, feedback_str, _ in game['guesses']]
+                })
+    return games
+
+
+def attach_games(rows, games):
+    """Add archived ``games`` to the per-day report ``rows`` (in place)."""
+    by_date = {row['date']: row for row in rows}
+    for game in games:
+        row = by_date.get(game.pop('game_date'))
+        if row is not None:
+            row.setdefault('games', []).append(game)
+    for row in rows:
+        row.setdefault('games', []).sort(key=lambda game: game['game_id'])
+    return rows
@@ -0,0 +1,634 @@
+"""ASGI entry point serving the game API on asyncio with aiosqlite.
+
+Run with ``uvicorn asgi_app:app`` after ``flask --app app init``. The
+routes, status codes and JSON bodies match the Flask app in ``app.py``;
+configuration, the word pool, guess dictionary, token signing and the
+password hasher are shared with it, so both servers can run against the
+same database.
+"""
+import asyncio
+import contextlib
+import gzip
+import json
+import logging
+import sqlite3
+import time
+from datetime import date
+
+import aiosqlite
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+import archive
+import daily_stats
+import http_cache
+import quota
+import ratelimit
+import feedback as fb
+import storage
+from app import (REPORT_STREAM_PAGE, app as flask_app, conditional_requests, db,
+                 is_allowed_guess, live_feed, password_hasher, rate_limiter, registration_error,
+                 response_cache, user_report_args, word_pool)
+from live_stats import HEARTBEAT
+from hashing import HashingBusy
+from tokens import InvalidToken, issue_token, verify_token
+from word_pool import decode_word, encode_word
+
+SECRET_KEY = flask_app.config['SECRET_KEY'].encode()
+ARCHIVE_DIR = flask_app.config['ARCHIVE_DIR']
+
+with flask_app.app_context():
+    DATABASE_PATH = db.engine.url.database
+
+log = logging.getLogger(__name__)
+
+
+def json_body(content):
+    # Same serialization as Flask's jsonify: sorted keys, compact, newline
+    return (json.dumps(content, sort_keys=True, separators=(',', ':')) + '\n').encode()
+
+
+def json_response(content, status_code=200, headers=None):
+    return Response(json_body(content), status_code=status_code, headers=headers,
+                    media_type='application/json')
+
+
+async def conditional_json(request, route, etag, immutable, build):
+    """As app.conditional_json; ``build`` is a coroutine function."""
+    send_gzip = (response_cache is not None
+                 and http_cache.accepts_gzip(request.headers.get('accept-encoding')))
+    headers = {'ETag': http_cache.gzip_etag(etag) if send_gzip else etag, 'Vary': 'Accept-Encoding',
+               'Cache-Control': http_cache.IMMUTABLE if immutable else http_cache.REVALIDATE}
+    if http_cache.not_modified(request.headers.get('if-none-match'), headers['ETag']):
+        conditional_requests.inc(route, 'not_modified')
+        return Response(status_code=304, headers=headers)
+
+    compressed = response_cache.get(etag) if response_cache is not None else None
+    conditional_requests.inc(route, 'miss' if compressed is None else 'hit')
+    if compressed is None:
+        body = json_body(await build())
+        if response_cache is None:
+            return Response(body, headers=headers, media_type='application/json')
+        compressed = response_cache.put(etag, body)
+
+    if send_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(compressed, headers=headers, media_type='application/json')
+    return Response(gzip.decompress(compressed), headers=headers, media_type='application/json')
+
+
+def error(message, status_code):
+    return json_response({'error': message}, status_code)
+
+
+class ConnectionPool:
+    """Fixed-size pool of aiosqlite connections.
+
+    Each aiosqlite connection owns one background thread, so the pool size
+    bounds the number of threads touching SQLite no matter how many
+    requests are in flight.
+    """
+
+    def __init__(self, path, size=8):
+        self.path = path
+        self.size = size
+        self._idle = asyncio.Queue()
+
+    async def open(self):
+        pragmas = storage.sqlite_pragmas(
+            wal=flask_app.config['SQLITE_WAL'],
+            busy_timeout_ms=flask_app.config['SQLITE_BUSY_TIMEOUT_MS'],
+            synchronous=flask_app.config['SQLITE_SYNCHRONOUS'],
+            mmap_size=flask_app.config['SQLITE_MMAP_SIZE'])
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(
+                self.path, timeout=flask_app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+            for pragma in pragmas:
+                await conn.execute(pragma)
+            self._idle.put_nowait(conn)
+
+    async def close(self):
+        while not self._idle.empty():
+            await self._idle.get_nowait().close()
+
+    async def acquire(self):
+        return await self._idle.get()
+
+    async def release(self, conn):
+        if conn.in_transaction:
+            await conn.rollback()
+        self._idle.put_nowait(conn)
+
+
+pool = ConnectionPool(DATABASE_PATH)
+
+
+class connection:
+    """``async with connection() as conn`` borrows a pooled connection."""
+
+    async def __aenter__(self):
+        self.conn = await pool.acquire()
+        return self.conn
+
+    async def __aexit__(self, *exc_info):
+        await pool.release(self.conn)
+
+
+async def fetchone(conn, sql, params=()):
+    async with conn.execute(sql, params) as cursor:
+        return await cursor.fetchone()
+
+
+async def fetchall(conn, sql, params=()):
+    async with conn.execute(sql, params) as cursor:
+        return await cursor.fetchall()
+
+
+async def load_daily_counters(conn, day):
+    columns = daily_stats.COUNTER_COLUMNS
+    row = await fetchone(conn, f"SELECT {', '.join(columns)} FROM daily_stats "
+                               "WHERE stats_date = ?", (day.isoformat(),))
+    return dict(zip(columns, row or [0] * len(columns)))
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def current_claims(request):
+    header = request.headers.get('authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        return verify_token(SECRET_KEY, header[7:].strip())
+    except InvalidToken:
+        return None
+
+
+def require_auth(role=None):
+    def decorator(endpoint):
+        async def wrapper(request):
+            claims = current_claims(request)
+            if claims is None:
+                return error('Valid token required', 401)
+            if role is not None and claims.role != role:
+                return error('Forbidden', 403)
+            request.state.claims = claims
+            return await endpoint(request)
+        return wrapper
+    return decorator
+
+
+def rate_limited(route, endpoint):
+    """Apply app.py's rate limit rules for ``route`` (a Flask endpoint name)."""
+    if rate_limiter is None:
+        return endpoint
+
+    async def wrapper(request):
+        claims = current_claims(request)
+        # The SQLite backend writes and may wait on its busy timeout
+        decision = await asyncio.to_thread(
+            rate_limiter.check, route, request.client.host if request.client else None,
+            claims.user_id if claims else None)
+        if decision is not None and not decision.allowed:
+            return json_response({'error': 'Too many requests, please retry later'}, 429,
+                                 headers=ratelimit.headers(decision))
+        response = await endpoint(request)
+        if decision is not None:
+            response.headers.update(ratelimit.headers(decision))
+        return response
+    return wrapper
+
+
+async def run_hasher(fn, *args):
+    # PasswordHasher blocks while its process pool works; keep that off the loop
+    result, _ = await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+    return result
+
+
+async def register(request):
+    data = await read_json(request) or {}
+    username = data.get('username', '').strip()
+    password = data.get('password', '').strip()
+
+    message = registration_error(username, password)
+    if message:
+        return error(message, 400)
+
+    hashed_pw = await run_hasher(password_hasher.hash, password)
+    async with connection() as conn:
+        try:
+            cursor = await conn.execute(
+                "INSERT INTO user (username, password, role, created_at) "
+                "VALUES (?, ?, 'player', CURRENT_TIMESTAMP)", (username, hashed_pw))
+            await conn.commit()
+        except sqlite3.IntegrityError:
+            await conn.rollback()
+            return error('Username already exists', 400)
+    return json_response({'message': 'Registration successful', 'user_id': cursor.lastrowid})
+
+
+async def login(request):
+    data = await read_json(request) or {}
+    username = data.get('username', '').strip()
+    password = data.get('password', '').strip()
+
+    async with connection() as conn:
+        user = await fetchone(conn, "SELECT id, password, role FROM user WHERE username = ?",
+                              (username,))
+
+    if user and await run_hasher(password_hasher.check, user[1], password):
+        token, expires = issue_token(SECRET_KEY, user[0], user[2],
+                                     flask_app.config['TOKEN_TTL_SECONDS'])
+        return json_response({
+            'message': 'Login successful',
+            'user_id': user[0],
+            'username': username,
+            'role': user[2],
+            'token': token,
+            'expires_at': expires
+        })
+
+    return error('Invalid username or password', 401)
+
+
+def warm_word_pool():
+    with flask_app.app_context():
+        word_pool.warm()
+
+
+# Both may block: the word pool checks the word version through a
+# SQLAlchemy query every few seconds and reloads after a change, and the
+# guess dictionary may remap its file. Callers run them in a worker thread
+def allowed_guess(word):
+    with flask_app.app_context():
+        return is_allowed_guess(word)
+
+
+def pick_word():
+    with flask_app.app_context():
+        return word_pool.random_word()
+
+
+@require_auth()
+async def start_game(request):
+    user_id = request.state.claims.user_id
+    today = date.today().isoformat()
+
+    target_word = await asyncio.to_thread(pick_word)
+    if target_word is None:
+        return error('No words available', 500)
+
+    async with connection() as conn:
+        row = await fetchone(conn, quota.RESERVE_SQL, quota.params(user_id, today))
+
+        if row is None:
+            await conn.rollback()
+            return error('Daily limit reached (3 games per day)', 400)
+
+        cursor = await conn.execute(
+            "INSERT INTO game (user_id, target_word, game_date, won, guesses_used, completed, "
+            "created_at) VALUES (?, ?, ?, 0, 0, 0, CURRENT_TIMESTAMP)",
+            (user_id, target_word, today))
+        increments = {'games_started': 1, 'users_active': int(row[0] == 1)}
+        await conn.execute(daily_stats.UPSERT_SQL, daily_stats.bump_params(today, **increments))
+        await conn.commit()
+    live_feed.record(today, **increments)
+
+    return json_response({
+        'game_id': cursor.lastrowid,
+        'target_word': target_word,
+        'remaining_guesses': 5
+    })
+
+
+@require_auth()
+async def submit_guess(request):
+    data = await read_json(request) or {}
+    game_id = data.get('game_id')
+    guess_word = data.get('guess_word', '').strip().upper()
+    user_id = request.state.claims.user_id
+
+    if not game_id or not guess_word:
+        return error('Missing required fields', 400)
+
+    try:
+        game_id = int(game_id)
+    except ValueError:
+        return error('Invalid game ID', 400)
+
+    if len(guess_word) != 5 or not guess_word.isascii() or not guess_word.isalpha():
+        return error('Guess must be exactly 5 uppercase letters', 400)
+
+    if not await asyncio.to_thread(allowed_guess, guess_word):
+        return error('Not in word list', 400)
+
+    async with connection() as conn:
+        game = await fetchone(
+            conn, "SELECT user_id, target_word, game_date, won, guesses_used FROM game WHERE id = ?",
+            (game_id,))
+
+        if not game or game[0] != user_id:
+            return error('Game not found', 404)
+
+        _, target_word, game_date, won, guess_count = game
+
+        if won:
+            return error('Game already completed', 400)
+
+        if guess_count >= 5:
+            return error('Maximum guesses reached', 400)
+
+        pattern = fb.score(target_word, guess_word)
+        is_correct = guess_word == target_word
+        remaining_guesses = 0 if is_correct else 4 - guess_count
+        game_completed = is_correct or (guess_count + 1 == 5)
+
+        cursor = await conn.execute(
+            "UPDATE game SET guesses_used = ?, won = ?, completed = ? "
+            "WHERE id = ? AND guesses_used = ?",
+            (guess_count + 1, is_correct, game_completed, game_id, guess_count))
+        if not cursor.rowcount:
+            await conn.rollback()
+            return error('Another guess for this game is in progress, please retry', 409)
+
+        await conn.execute(
+            "INSERT INTO guess (game_id, guess_number, guess_code, feedback_code, created_at) "
+            "VALUES (?, ?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))",
+            (game_id, guess_count + 1, encode_word(guess_word), pattern))
+        if game_completed:
+            increments = daily_stats.completion_increments(is_correct, guess_count + 1)
+            await conn.execute(daily_stats.UPSERT_SQL,
+                               daily_stats.bump_params(game_date, **increments))
+        await conn.commit()
+    if game_completed:
+        live_feed.record(game_date, **increments)
+
+    return json_response({
+        'feedback': fb.pattern_labels(pattern),
+        'is_correct': is_correct,
+        'remaining_guesses': remaining_guesses,
+        'game_completed': game_completed
+    })
+
+
+@require_auth(role='admin')
+async def daily_report(request):
+    report_date_str = request.query_params.get('date', date.today().isoformat())
+
+    try:
+        report_date = date.fromisoformat(report_date_str)
+    except ValueError:
+        return error('Invalid date format. Use YYYY-MM-DD', 400)
+
+    async with connection() as conn:
+        counters = await load_daily_counters(conn, report_date)
+    etag = http_cache.make_etag('daily-report', report_date, counters)
+
+    async def build():
+        return daily_stats.report(report_date, counters)
+
+    return await conditional_json(request, '/api/daily-report', etag,
+                                  http_cache.day_is_closed(report_date, date.today(), counters),
+                                  build)
+
+
+# Subscribers wait on this; publish_live_stats notifies it once per new event
+live_published = asyncio.Condition()
+
+
+async def publish_live_stats():
+    while True:
+        await asyncio.sleep(live_feed.interval)
+        if not live_feed.subscribers:
+            live_feed.reset_event()
+            continue
+        try:
+            today, now = date.today(), time.monotonic()
+            if live_feed.needs_load(today, now):
+                live_feed.begin_load()
+                async with connection() as conn:
+                    counters = await load_daily_counters(conn, today)
+                live_feed.apply_load(today, counters, now)
+        except sqlite3.Error:
+            log.exception('Live stats update failed')
+        if live_feed.publish():
+            async with live_published:
+                live_published.notify_all()
+
+
+async def _live_stats_events():
+    live_feed.subscribe()
+    try:
+        yield f'retry: {int(live_feed.interval * 1000)}\n\n'
+        sent = None
+        while True:
+            async with live_published:
+                if live_feed.event is None or live_feed.sequence == sent:
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(live_published.wait(), live_feed.heartbeat)
+                event, sequence = live_feed.event, live_feed.sequence
+            if event is not None and sequence != sent:
+                sent = sequence
+                yield event
+            else:
+                yield HEARTBEAT
+    finally:
+        live_feed.unsubscribe()
+
+
+@require_auth(role='admin')
+async def live_stats_stream(request):
+    return StreamingResponse(_live_stats_events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def user_report_page(conn, user_id, after=None, limit=None, detail='summary',
+                           include_archive=False):
+    """aiosqlite version of app.user_report_page."""
+    sql = ("SELECT game_date, COUNT(id), SUM(won) FROM game WHERE user_id = ?"
+           + (" AND game_date < ?" if after is not None else "")
+           + " GROUP BY game_date ORDER BY game_date DESC"
+           + (" LIMIT ?" if limit is not None else ""))
+    params = [user_id]
+    if after is not None:
+        params.append(after.isoformat())
+    if limit is not None:
+        params.append(limit)
+
+    rows = [{
+        'date': game_date,
+        'words_tried': words_tried,
+        'correct_guesses': correct_guesses or 0
+    } for game_date, words_tried, correct_guesses in await fetchall(conn, sql, params)]
+
+    if include_archive:
+        archived = await fetchall(conn, archive.summary_sql(after, limit),
+                                  archive.summary_params(user_id, after, limit))
+        rows = archive.merge_summaries(rows, archived, limit)
+
+    if detail == 'games' and rows:
+        games = await fetchall(
+            conn, "SELECT id, game_date, target_word, won, guesses_used FROM game "
+                  "WHERE user_id = ? AND game_date <= ? AND game_date >= ? ORDER BY id",
+            (user_id, rows[0]['date'], rows[-1]['date']))
+        guesses = {}
+        if games:
+            placeholders = ', '.join('?' * len(games))
+            for game_id, guess_number, guess_code, feedback_code in await fetchall(
+                    conn, "SELECT game_id, guess_number, guess_code, feedback_code FROM guess "
+                          f"WHERE game_id IN ({placeholders}) ORDER BY guess_number",
+                    [g[0] for g in games]):
+                guesses.setdefault(game_id, []).append({
+                    'guess_number': guess_number,
+                    'guess_word': decode_word(guess_code),
+                    'feedback': fb.pattern_labels(feedback_code)
+                })
+        by_date = {row['date']: row for row in rows}
+        for row in rows:
+            row['games'] = []
+        for game_id, game_date, target_word, won, guesses_used in games:
+            by_date[game_date]['games'].append({
+                'game_id': game_id,
+                'target_word': target_word,
+                'won': bool(won),
+                'guesses_used': guesses_used,
+                'guesses': guesses.get(game_id, [])
+            })
+
+        if include_archive:
+            span = {'user_id': user_id, 'first_date': rows[-1]['date'], 'last_date': rows[0]['date']}
+            paths = [path for _, path in await fetchall(conn, archive.CHUNK_PATHS_SQL, span)]
+            games = await asyncio.to_thread(archive.read_games, ARCHIVE_DIR, paths, user_id,
+                                            span['first_date'], span['last_date'])
+            archive.attach_games(rows, games)
+
+    return rows
+
+
+async def _stream_user_report(user_id, after, limit, detail, include_archive=False):
+    remaining = limit
+    async with connection() as conn:
+        while remaining is None or remaining > 0:
+            page_size = REPORT_STREAM_PAGE if remaining is None else min(remaining, REPORT_STREAM_PAGE)
+            rows = await user_report_page(conn, user_id, after=after, limit=page_size, detail=detail,
+                                          include_archive=include_archive)
+            for row in rows:
+                yield json.dumps(row) + '\n'
+            if len(rows) < page_size:
+                break
+            after = date.fromisoformat(rows[-1]['date'])
+            if remaining is not None:
+                remaining -= len(rows)
+
+
+@require_auth(role='admin')
+async def user_report(request):
+    username = request.query_params.get('username')
+
+    if not username:
+        return error('Username required', 400)
+
+    async with connection() as conn:
+        user = await fetchone(conn, "SELECT id FROM user WHERE username = ?", (username,))
+
+    if not user:
+        return error('User  not found', 404)
+
+    options, message = user_report_args(request.query_params)
+    if message:
+        return error(message, 400)
+
+    detail, after, limit = options['detail'], options['after'], options['limit']
+    include_archive = options['include_archive']
+
+    if options['ndjson']:
+        return StreamingResponse(_stream_user_report(user[0], after, limit, detail, include_archive),
+                                 media_type='application/x-ndjson')
+
+    today = date.today()
+    archive_generation = None
+    async with connection() as conn:
+        active_games = await fetchall(
+            conn, http_cache.USER_ACTIVE_SQL,
+            {'user_id': user[0], 'open_from': http_cache.open_from(today).isoformat()})
+        closed, active = http_cache.user_page_state(after, today, active_games)
+        if not (closed and include_archive):
+            archive_generation = (await fetchone(conn, http_cache.ARCHIVE_GENERATION_SQL))[0]
+    etag = http_cache.make_etag('user-report', user[0], detail, after, limit, include_archive,
+                                archive_generation, active)
+
+    async def build():
+        next_cursor = None
+        async with connection() as conn:
+            if limit is None:
+                report_data = await user_report_page(conn, user[0], after=after, detail=detail,
+                                                     include_archive=include_archive)
+            else:
+                report_data = await user_report_page(conn, user[0], after=after, limit=limit + 1,
+                                                     detail=detail, include_archive=include_archive)
+                if len(report_data) > limit:
+                    report_data = report_data[:limit]
+                    next_cursor = report_data[-1]['date']
+
+        return {
+            'username': username,
+            'report': report_data,
+            'next_cursor': next_cursor
+        }
+
+    return await conditional_json(request, '/api/user-report', etag,
+                                  closed and include_archive, build)
+
+
+@require_auth()
+async def game_status(request):
+    async with connection() as conn:
+        row = await fetchone(conn, quota.USED_SQL,
+                             quota.params(request.state.claims.user_id, date.today()))
+    games_today = row[0] if row else 0
+
+    return json_response({
+        'games_played_today': games_today,
+        'games_remaining': quota.remaining(games_today)
+    })
+
+
+async def hashing_busy(request, exc):
+    return json_response({'error': 'Server busy, please retry shortly'}, 503,
+                         headers={'Retry-After': str(exc.retry_after)})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await pool.open()
+    await asyncio.to_thread(warm_word_pool)
+    publisher = asyncio.create_task(publish_live_stats())
+    try:
+        yield
+    finally:
+        publisher.cancel()
+        await pool.close()
+        password_hasher.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/register', rate_limited('register', register), methods=['POST']),
+        Route('/api/login', rate_limited('login', login), methods=['POST']),
+        Route('/api/start-game', rate_limited('start_game', start_game), methods=['POST']),
+        Route('/api/submit-guess', rate_limited('submit_guess', submit_guess), methods=['POST']),
+        Route('/api/daily-report', rate_limited('daily_report', daily_report), methods=['GET']),
+        Route('/api/live-stats', rate_limited('live_stats_stream', live_stats_stream),
+              methods=['GET']),
+        Route('/api/user-report', rate_limited('user_report', user_report), methods=['GET']),
+        Route('/api/game-status', rate_limited('game_status', game_status), methods=['GET']),
+    ],
+    exception_handlers={HashingBusy: hashing_busy},
+    lifespan=lifespan,
+)
@@ -0,0 +1,331 @@
+"""Load generator and latency benchmark for the game API.
+
+Simulates N concurrent players. Each one registers, logs in, plays its three
+daily games with up to five guesses each, and now and then an admin report
+call is mixed in. Prints throughput and p50/p95/p99 latency per endpoint
+and can write the numbers to a JSON baseline or compare against one.
+
+    python benchmark.py --players 50                    # in-process Flask test client
+    python benchmark.py --url http://localhost:5000     # running server (Flask or ASGI)
+    python benchmark.py --out baseline.json
+    python benchmark.py --compare baseline.json --tolerance 0.2
+    python benchmark.py --startup 10                    # worker start-up time
+
+In-process runs use a throwaway SQLite database so game.db is untouched.
+Every simulated player comes from one address, so start a server under
+test with ``RATE_LIMIT_ENABLED=0``; any 429 fails the run.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Answer words seeded by init_db; always valid guesses
+GUESS_WORDS = [
+    'CRANE', 'SLOTH', 'TRACE', 'SNOUT', 'STARE', 'SLEPT', 'SPLIT', 'TRASH',
+    'PLANT', 'FLASK', 'STORM', 'CLOUD', 'RIVER', 'OCEAN', 'MOUNT', 'PEAKS',
+    'FLAME', 'SPARK', 'BLADE', 'SWORD'
+]
+
+PLAYER_PASSWORD = 'bench1$'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def letters(n, width=4):
+    # Usernames must be letters only
+    out = []
+    for _ in range(width):
+        n, rem = divmod(n, 26)
+        out.append(string.ascii_lowercase[rem])
+    return ''.join(reversed(out))
+
+
+class FlaskClient:
+    """In-process transport over the Flask test client."""
+
+    def __init__(self, flask_app):
+        self._client = flask_app.test_client()
+
+    def request(self, method, path, json_body=None, headers=None):
+        response = self._client.open(path, method=method, json=json_body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    """Transport over a keep-alive requests.Session against a live server."""
+
+    def __init__(self, base_url):
+        import requests
+        self._base_url = base_url.rstrip('/')
+        self._session = requests.Session()
+
+    def request(self, method, path, json_body=None, headers=None):
+        response = self._session.request(method, self._base_url + path, json=json_body,
+                                         headers=headers, timeout=30)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def timed(self, client, endpoint, method, path, json_body=None, headers=None):
+        started = time.perf_counter()
+        status, body = client.request(method, path, json_body, headers)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.samples.append((endpoint, elapsed, status))
+        return status, body
+
+
+def play(client, recorder, name, admin_headers, rng, admin_ratio):
+    recorder.timed(client, 'register', 'POST', '/api/register',
+                   {'username': name, 'password': PLAYER_PASSWORD})
+    status, body = recorder.timed(client, 'login', 'POST', '/api/login',
+                                  {'username': name, 'password': PLAYER_PASSWORD})
+    if status != 200:
+        return
+    headers = {'Authorization': f"Bearer {body['token']}"}
+
+    for _ in range(3):
+        recorder.timed(client, 'game-status', 'GET', '/api/game-status', headers=headers)
+        status, game = recorder.timed(client, 'start-game', 'POST', '/api/start-game', {},
+                                      headers=headers)
+        if status != 200:
+            break
+        for _ in range(5):
+            guess = game['target_word'] if rng.random() < 0.2 else rng.choice(GUESS_WORDS)
+            status, result = recorder.timed(client, 'submit-guess', 'POST', '/api/submit-guess',
+                                            {'game_id': game['game_id'], 'guess_word': guess},
+                                            headers=headers)
+            if status != 200 or result['game_completed']:
+                break
+        if admin_headers and rng.random() < admin_ratio:
+            recorder.timed(client, 'daily-report', 'GET', '/api/daily-report',
+                           headers=admin_headers)
+            recorder.timed(client, 'user-report', 'GET',
+                           f'/api/user-report?username={name}&limit=30', headers=admin_headers)
+
+
+def summarize(samples, wall_seconds):
+    by_endpoint = {}
+    for endpoint, elapsed, status in samples:
+        by_endpoint.setdefault(endpoint, []).append((elapsed, status))
+
+    endpoints = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = sorted(elapsed * 1000 for elapsed, _ in rows)
+        # Client errors (409 retries, 429s, ...) are failures too, not just 5xx
+        failed = Counter(str(status) for _, status in rows if not 200 <= status < 300)
+        endpoints[endpoint] = {
+            'requests': len(rows),
+            'errors': sum(n for status, n in failed.items() if int(status) >= 500),
+            'non_2xx': sum(failed.values()),
+            'statuses': dict(sorted(failed.items())),
+            'throughput_rps': round(len(rows) / wall_seconds, 2),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+        }
+    return {
+        'requests': len(samples),
+        'seconds': round(wall_seconds, 3),
+        'throughput_rps': round(len(samples) / wall_seconds, 2) if wall_seconds else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of ``results`` against ``baseline``, as readable lines."""
+    regressions = []
+    for endpoint, base in baseline.get('endpoints', {}).items():
+        current = results['endpoints'].get(endpoint)
+        if current is None:
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if base[key] and current[key] > base[key] * (1 + tolerance):
+                regressions.append(f'{endpoint} {key}: {base[key]} -> {current[key]}')
+        if current['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{endpoint} throughput_rps: {base['throughput_rps']} -> "
+                               f"{current['throughput_rps']}")
+    return regressions
+
+
+def print_table(results):
+    print(f"{results['requests']} requests in {results['seconds']}s "
+          f"({results['throughput_rps']} req/s)")
+    print(f"{'endpoint':<14}{'reqs':>7}{'5xx':>6}{'non-2xx':>9}{'req/s':>9}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, row in results['endpoints'].items():
+        print(f"{endpoint:<14}{row['requests']:>7}{row['errors']:>6}{row['non_2xx']:>9}"
+              f"{row['throughput_rps']:>9}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    for endpoint, row in results['endpoints'].items():
+        if row['statuses']:
+            counts = ', '.join(f'{status} x{n}' for status, n in row['statuses'].items())
+            print(f'  {endpoint}: {counts}')
+
+
+def use_throwaway_database():
+    # Must run before app is imported (here or in a child process)
+    db_dir = tempfile.mkdtemp(prefix='bench-')
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(db_dir, 'bench.db')}")
+    os.environ.setdefault('GUESS_DICTIONARY_PATH', os.path.join(db_dir, 'guesses.bitset'))
+    # Every simulated player shares one address
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+    os.environ.setdefault('SECRET_KEY', os.urandom(16).hex())
+
+
+def make_client_factory(args):
+    if args.url:
+        return lambda: HttpClient(args.url)
+
+    use_throwaway_database()
+    from app import app as flask_app, init_db
+    init_db()
+    return lambda: FlaskClient(flask_app)
+
+
+# Run in a fresh interpreter: import the app, then fork a "worker" and time
+# how long it takes to answer its first request (game-status reads the DB)
+STARTUP_PROBE = '''
+import json, os, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+imported = time.perf_counter()
+from tokens import issue_token
+token, _ = issue_token(app.config['SECRET_KEY'].encode(), 1, 'admin', 60)
+read_fd, write_fd = os.pipe()
+forked = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    response = app.test_client().get('/api/game-status',
+                                     headers={'Authorization': 'Bearer ' + token})
+    os.write(write_fd, json.dumps([response.status_code, time.perf_counter()]).encode())
+    os._exit(0)
+os.waitpid(pid, 0)
+status, served = json.loads(os.read(read_fd, 1024))
+print(json.dumps({'status': status, 'import_ms': (imported - started) * 1000,
+                  'fork_to_first_response_ms': (served - forked) * 1000}))
+'''
+
+
+def measure_startup(runs):
+    """Median and max start-up timings over ``runs`` fresh interpreters."""
+    use_throwaway_database()
+    here = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, '-c', 'from app import init_db; init_db()'],
+                   cwd=here, check=True)
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', STARTUP_PROBE], cwd=here, check=True,
+                             capture_output=True, text=True).stdout
+        sample = json.loads(out.strip().splitlines()[-1])
+        sample['process_ms'] = (time.perf_counter() - started) * 1000
+        samples.append(sample)
+
+    results = {'runs': runs, 'errors': sum(1 for s in samples if s['status'] != 200)}
+    for key in ('import_ms', 'fork_to_first_response_ms', 'process_ms'):
+        values = [s[key] for s in samples]
+        results[key] = {'median': round(statistics.median(values), 3),
+                        'max': round(max(values), 3)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=20)
+    parser.add_argument('--url', help='Base URL of a running server; default is in-process Flask')
+    parser.add_argument('--admin-password', default='adminpass@123')
+    parser.add_argument('--admin-ratio', type=float, default=0.1,
+                        help='Chance of an admin report pair after each game')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--startup', type=int, metavar='RUNS',
+                        help='Measure worker start-up over RUNS fresh processes instead')
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        results = measure_startup(args.startup)
+        print(f"{'phase':<28}{'median ms':>11}{'max ms':>10}")
+        for key in ('import_ms', 'fork_to_first_response_ms', 'process_ms'):
+            print(f"{key:<28}{results[key]['median']:>11}{results[key]['max']:>10}")
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        return 1 if results['errors'] else 0
+
+    new_client = make_client_factory(args)
+    run_tag = letters(random.Random().randrange(26 ** 4))
+
+    admin_client = new_client()
+    status, body = admin_client.request('POST', '/api/login',
+                                        {'username': 'admin', 'password': args.admin_password})
+    admin_headers = {'Authorization': f"Bearer {body['token']}"} if status == 200 else None
+
+    recorder = Recorder()
+    threads = []
+    for i in range(args.players):
+        rng = random.Random(args.seed * 100003 + i)
+        name = f'bench{run_tag}{letters(i)}'
+        threads.append(threading.Thread(
+            target=play, args=(new_client(), recorder, name, admin_headers, rng, args.admin_ratio)))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results = summarize(recorder.samples, time.perf_counter() - started)
+    results['players'] = args.players
+    results['target'] = args.url or 'flask-test-client'
+
+    print_table(results)
+
+    limited = sum(1 for _, _, status in recorder.samples if status == 429)
+    if limited:
+        print(f'ERROR: {limited} requests were rate limited (429), so these numbers are not '
+              f'comparable. Start the server with RATE_LIMIT_ENABLED=0.', file=sys.stderr)
+        return 2
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Per-day rollups kept in the ``daily_stats`` table.
+
+``start_game`` and ``submit_guess`` bump the row for the game's date inside
+their own transaction, so ``/api/daily-report`` is a primary-key lookup.
+``rebuild`` recomputes rows from the ``game`` table in one pass.
+"""
+from sqlalchemy import text
+
+MAX_GUESSES = 5
+SOLVED_COLUMNS = [f'solved_{n}' for n in range(1, MAX_GUESSES + 1)]
+COUNTER_COLUMNS = ['users_active', 'games_started', 'games_won', 'games_lost'] + SOLVED_COLUMNS
+
+CREATE_SQL = text(
+    "CREATE TABLE IF NOT EXISTS daily_stats ("
+    "stats_date DATE NOT NULL PRIMARY KEY, "
+    + ", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in COUNTER_COLUMNS)
+    + ")"
+)
+
+# Plain SQL with :named parameters, usable from sqlite3/aiosqlite as well
+UPSERT_SQL = (
+    "INSERT INTO daily_stats (stats_date, " + ", ".join(COUNTER_COLUMNS) + ") "
+    "VALUES (:stats_date, " + ", ".join(f":{c}" for c in COUNTER_COLUMNS) + ") "
+    "ON CONFLICT(stats_date) DO UPDATE SET "
+    + ", ".join(f"{c} = {c} + excluded.{c}" for c in COUNTER_COLUMNS)
+)
+_UPSERT_SQL = text(UPSERT_SQL)
+
+_INSERT_SQL = text(
+    "INSERT INTO daily_stats (stats_date, " + ", ".join(COUNTER_COLUMNS) + ") "
+    "VALUES (:stats_date, " + ", ".join(f":{c}" for c in COUNTER_COLUMNS) + ")"
+)
+
+
+def _to_iso(day):
+    return day.isoformat() if hasattr(day, 'isoformat') else day
+
+
+def _empty_row(day):
+    row = dict.fromkeys(COUNTER_COLUMNS, 0)
+    row['stats_date'] = _to_iso(day)
+    return row
+
+
+def completion_increments(won, guesses_used):
+    """Counter increments for a game that has just finished."""
+    if won:
+        # Legacy rows may predate guesses_used; clamp into the histogram
+        solved_in = min(max(guesses_used or 1, 1), MAX_GUESSES)
+        return {'games_won': 1, f'solved_{solved_in}': 1}
+    return {'games_lost': 1}
+
+
+def bump_params(day, **increments):
+    """Parameters for UPSERT_SQL adding ``increments`` to ``day``'s row."""
+    row = _empty_row(day)
+    row.update(increments)
+    return row
+
+
+def bump(session, day, **increments):
+    """Add ``increments`` to the row for ``day`` in the current transaction."""
+    session.execute(_UPSERT_SQL, bump_params(day, **increments))
+
+
+def report(day, counters):
+    """The /api/daily-report body for ``day`` from ``{column: count}``."""
+    distribution = {str(n): counters[f'solved_{n}'] for n in range(1, MAX_GUESSES + 1)}
+    distribution['failed'] = counters['games_lost']
+    return {
+        'date': day.isoformat() if hasattr(day, 'isoformat') else day,
+        'num_users': counters['users_active'],
+        'num_correct': counters['games_won'],
+        'games_played': counters['games_started'],
+        'guess_distribution': distribution
+    }
+
+
+def rebuild(conn, chunk_size=10000, after=None):
+    """Recompute rollups from ``game`` in one ordered, streaming pass.
+
+    Only days after ``after`` are touched. Pass the archive horizon: the
+    games of earlier days are gone from ``game``, so their rows can't be
+    recomputed and are kept as they are. Rows are read in ``chunk_size``
+    batches ordered by date (served by the game_date index), so only the
+    current day's accumulator and its set of user ids are ever held in
+    memory.
+    """
+    after = _to_iso(after) if after is not None else ''
+    conn.execute(text("DELETE FROM daily_stats WHERE stats_date > :after"), {'after': after})
+    result = conn.execute(text(
+        "SELECT game_date, user_id, won, completed, guesses_used "
+        "FROM game WHERE game_date > :after ORDER BY game_date"), {'after': after})
+    current, users, days = None, set(), 0
+    while True:
+        rows = result.fetchmany(chunk_size)
+        if not rows:
+            break
+        for game_date, user_id, won, completed, guesses_used in rows:
+            if current is None or current['stats_date'] != game_date:
+                if current is not None:
+                    conn.execute(_INSERT_SQL, current)
+                    days += 1
+                current, users = _empty_row(game_date), set()
+            if user_id not in users:
+                users.add(user_id)
+                current['users_active'] += 1
+            current['games_started'] += 1
+            if won or completed:
+                for column, inc in completion_increments(won, guesses_used).items():
+                    current[column] += inc
+    if current is not None:
+        conn.execute(_INSERT_SQL, current)
+        days += 1
+    return days
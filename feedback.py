@@ -0,0 +1,101 @@
+WORD_LENGTH = 5
+NUM_PATTERNS = 3 ** WORD_LENGTH  # 243
+
+GRAY, ORANGE, GREEN = 0, 1, 2
+LABELS = ('gray', 'orange', 'green')
+LETTERS = ('Y', 'O', 'G')  # stored Guess.feedback alphabet
+
+_POWERS = [3 ** i for i in range(WORD_LENGTH)]
+
+
+def _build_tables():
+    labels, strings = [], []
+    for code in range(NUM_PATTERNS):
+        digits = [(code // 3 ** i) % 3 for i in range(WORD_LENGTH)]
+        labels.append([LABELS[d] for d in digits])
+        strings.append(''.join(LETTERS[d] for d in digits))
+    return labels, strings
+
+
+# Pattern code -> API labels / stored 'GOYGG' string
+PATTERN_LABELS, PATTERN_STRINGS = _build_tables()
+_STRING_TO_PATTERN = {s: code for code, s in enumerate(PATTERN_STRINGS)}
+
+
+def pattern_labels(code):
+    return list(PATTERN_LABELS[code])
+
+
+def pattern_string(code):
+    return PATTERN_STRINGS[code]
+
+
+def pattern_from_string(feedback_str):
+    return _STRING_TO_PATTERN[feedback_str]
+
+
+def score(secret, guess):
+    """Feedback pattern for one (secret, guess) pair as a base-3 code.
+
+    Digit i (weight 3**i) is GRAY/ORANGE/GREEN for position i. Greens are
+    taken first, then oranges left to right while unmatched copies of the
+    letter remain in the secret.
+    """
+    digits = [GRAY] * WORD_LENGTH
+    remaining = {}
+    for i in range(WORD_LENGTH):
+        if guess[i] == secret[i]:
+            digits[i] = GREEN
+        else:
+            remaining[secret[i]] = remaining.get(secret[i], 0) + 1
+    for i in range(WORD_LENGTH):
+        if digits[i] == GRAY and remaining.get(guess[i], 0) > 0:
+            digits[i] = ORANGE
+            remaining[guess[i]] -= 1
+    code = 0
+    for i in reversed(range(WORD_LENGTH)):
+        code = code * 3 + digits[i]
+    return code
+
+
+def encode_words(words):
+    """Encode 5-letter A-Z words as an (n, 5) uint8 array of letter indexes."""
+    import numpy as np  # deferred: only the batch paths need numpy
+    if not words:
+        return np.empty((0, WORD_LENGTH), dtype=np.uint8)
+    buf = np.frombuffer(''.join(words).encode('ascii'), dtype=np.uint8)
+    return (buf.reshape(-1, WORD_LENGTH) - 65).astype(np.uint8)
+
+
+def score_arrays(secrets, guesses):
+    """Vectorized feedback for aligned (n, 5) letter arrays.
+
+    Returns an (n,) uint8 array of pattern codes. Same rules as score():
+    one pass for greens, then one pass per position for oranges against the
+    per-row counts of unmatched secret letters.
+    """
+    import numpy as np
+    n = secrets.shape[0]
+    rows = np.arange(n)
+    green = secrets == guesses
+    digits = np.where(green, GREEN, GRAY).astype(np.uint8)
+
+    # Each statement touches one cell per row, so plain fancy-index += is
+    # safe here (no repeated indexes within a single assignment)
+    counts = np.zeros((n, 26), dtype=np.int8)
+    for i in range(WORD_LENGTH):
+        counts[rows, secrets[:, i]] += ~green[:, i]
+
+    for i in range(WORD_LENGTH):
+        letters = guesses[:, i]
+        orange = ~green[:, i] & (counts[rows, letters] > 0)
+        digits[orange, i] = ORANGE
+        counts[rows[orange], letters[orange]] -= 1
+
+    powers = np.array(_POWERS, dtype=np.uint8)
+    return (digits * powers).sum(axis=1, dtype=np.uint16).astype(np.uint8)
+
+
+def score_batch(secrets, guesses):
+    """Score aligned lists of secret and guess words; returns pattern codes."""
+    return score_arrays(encode_words(secrets), encode_words(guesses))
@@ -0,0 +1,105 @@
+import mmap
+import os
+import threading
+import time
+
+from word_pool import ALPHABET_SIZE, WORD_LENGTH, encode_word
+
+# One bit per possible 5-letter word: 26**5 bits, about 1.4 MB on disk
+NUM_CODES = ALPHABET_SIZE ** WORD_LENGTH
+BITSET_BYTES = (NUM_CODES + 7) // 8
+
+
+def is_word_shape(word):
+    """True for exactly five ASCII letters A-Z (already upper-cased)."""
+    return len(word) == WORD_LENGTH and word.isascii() and word.isalpha() and word.isupper()
+
+
+def build_bitset(path, word_iters):
+    """Write a bitset file for every valid word yielded by ``word_iters``.
+
+    The file is written next to ``path`` and renamed into place so readers
+    that already have the old file mapped are never exposed to a partial
+    write. Returns the number of distinct words set.
+    """
+    bits = bytearray(BITSET_BYTES)
+    count = 0
+    for words in word_iters:
+        for word in words:
+            word = word.strip().upper()
+            if not is_word_shape(word):
+                continue
+            code = encode_word(word)
+            byte, bit = code >> 3, 1 << (code & 7)
+            if not bits[byte] & bit:
+                bits[byte] |= bit
+                count += 1
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(bits)
+    os.replace(tmp_path, path)
+    return count
+
+
+class GuessDictionary:
+    """Allowed-guess set backed by a read-only memory-mapped bitset.
+
+    Every worker maps the same file, so the pages live once in the OS page
+    cache rather than once per process. Membership is one byte read. When
+    no bitset file exists the dictionary is disabled and only the word
+    shape is checked. At most every ``check_interval`` seconds the file's
+    inode and mtime are compared with the mapped one, so a bitset rebuilt
+    by another process is remapped.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._map = None
+        self._identity = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        new_map = identity = None
+        try:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                identity = st.st_ino, st.st_mtime_ns
+                new_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, TypeError):
+            pass
+        with self._lock:
+            # Swap, never clear first: a concurrent reader sees the old or new map
+            self._map, self._identity = new_map, identity
+            self._checked_at = time.monotonic()
+
+    def _refresh_if_replaced(self):
+        # build_bitset renames a new file into place; remap if that happened.
+        # The old map isn't closed: requests reading it drop it when they finish
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            st = os.stat(self.path)
+        except (OSError, TypeError):
+            return
+        if (st.st_ino, st.st_mtime_ns) != self._identity:
+            self.reload()
+
+    @property
+    def enabled(self):
+        self._refresh_if_replaced()
+        return self._map is not None
+
+    def __contains__(self, word):
+        if not is_word_shape(word):
+            return False
+        self._refresh_if_replaced()
+        bits = self._map
+        if bits is None:
+            return True
+        code = encode_word(word)
+        return bool(bits[code >> 3] & (1 << (code & 7)))
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full or a hash timed out."""
+
+    def __init__(self, retry_after):
+        super().__init__('Password hashing is busy')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs werkzeug's password hashing off the request thread.
+
+    With ``workers > 0`` hashes run in a process pool so a burst of logins
+    doesn't hold the GIL in the web worker. At most ``max_pending`` hashes
+    may be queued or running per process; beyond that ``HashingBusy`` is
+    raised straight away instead of queueing more work. ``workers=0`` hashes
+    inline on the calling thread.
+
+    The pool is created lazily and re-created after a fork, so the hasher
+    can be built at import time in a pre-forking server.
+    """
+
+    def __init__(self, workers=0, max_pending=16, timeout=5.0, retry_after=1):
+        self.workers = workers
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _run(self, fn, *args):
+        """Run ``fn(*args)``; returns ``(result, seconds)``."""
+        started = time.perf_counter()
+        if not self.workers:
+            return fn(*args), time.perf_counter() - started
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(self.retry_after)
+        try:
+            future = self._executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # Release the slot when the work really finishes, not when we stop
+        # waiting, so a timed-out hash still counts against the bound
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy(self.retry_after)
+        return result, time.perf_counter() - started
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def shutdown(self):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
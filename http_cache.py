@@ -0,0 +1,143 @@
+"""Conditional GET for the report endpoints, plus a compressed response cache.
+
+An ETag is a hash of the request and a cheap version of the data behind it:
+
+``daily_report``
+    The day's ``daily_stats`` counters, one primary-key read. Every change
+    to the day bumps at least one of them.
+``user_report``
+    The newest ``archive_chunk`` id (archiving moves games out of the hot
+    report), plus the user's games that can still change (``USER_ACTIVE_SQL``):
+    those from the open days, and any older game left unfinished, read
+    through ``ix_game_user_date`` and the partial ``ix_game_unfinished``.
+
+A game can be finished on any later day, and one started just before
+midnight may commit after it. So a day is closed only once it is older than
+``open_from(today)`` and none of its games is unfinished. For a daily
+report that shows in its own counters: every started game is won or lost.
+Responses that only cover closed days, and can't be changed by archiving,
+are sent as ``immutable``. Everything else is sent ``no-cache``, so
+clients revalidate with ``If-None-Match`` and usually get a bodyless 304.
+
+``ResponseCache`` keeps gzip-compressed bodies keyed by ETag. The ETag
+covers every input, so an entry never goes stale; old versions simply age
+out of the LRU. The gzip body is a different representation from the
+identity one, so it is sent under its own strong tag (``gzip_etag``). The
+``*_SQL`` strings use plain :named parameters so sqlite3/aiosqlite can run
+them too.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+IMMUTABLE = 'private, max-age=31536000, immutable'
+REVALIDATE = 'private, no-cache'
+
+ARCHIVE_GENERATION_SQL = "SELECT COALESCE(MAX(id), 0) FROM archive_chunk"
+
+USER_ACTIVE_SQL = (
+    "SELECT id, game_date, guesses_used FROM game "
+    "WHERE user_id = :user_id AND game_date >= :open_from "
+    "UNION ALL "
+    "SELECT id, game_date, guesses_used FROM game "
+    "WHERE user_id = :user_id AND completed = 0 AND game_date < :open_from "
+    "ORDER BY id")
+
+
+def make_etag(*parts):
+    digest = hashlib.blake2b(json.dumps(parts, default=str).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def open_from(today):
+    """Oldest day that still counts as open, whatever its games' state."""
+    return today - timedelta(days=1)
+
+
+def day_is_closed(day, today, counters):
+    """True if no game from ``day`` can change; ``counters`` is its daily_stats row."""
+    return (day < open_from(today)
+            and counters['games_started'] == counters['games_won'] + counters['games_lost'])
+
+
+def user_page_state(after, today, active_games):
+    """``(closed, fingerprint)`` of a user-report page of days before ``after``.
+
+    ``active_games`` are the user's ``USER_ACTIVE_SQL`` rows. The page is
+    closed when it ends before the open days and holds none of them. Then
+    the fingerprint is None; otherwise it is the rows' ids and guess counts.
+    """
+    first_open = open_from(today).isoformat()
+    closed = (after is not None and after.isoformat() <= first_open
+              and all(str(game_date) >= after.isoformat() for _, game_date, _ in active_games))
+    if closed:
+        return True, None
+    return False, [(game_id, guesses_used) for game_id, _, guesses_used in active_games]
+
+
+def gzip_etag(etag):
+    """Strong ETag of the gzip representation of the body tagged ``etag``."""
+    return etag[:-1] + '-gz"'
+
+
+def not_modified(if_none_match, etag):
+    """True if the ``If-None-Match`` header value matches ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # If-None-Match uses weak comparison
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+def accepts_gzip(accept_encoding):
+    for part in (accept_encoding or '').split(','):
+        coding, *params = part.split(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+class ResponseCache:
+    """LRU of gzip-compressed response bodies, bounded by compressed size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag):
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is not None:
+                self._entries.move_to_end(etag)
+            return body
+
+    def put(self, etag, body):
+        """Compress and store ``body``; returns the compressed bytes."""
+        compressed = gzip.compress(body, compresslevel=6, mtime=0)
+        if len(compressed) > self.max_bytes:
+            return compressed
+        with self._lock:
+            if etag not in self._entries:
+                self._entries[etag] = compressed
+                self.size += len(compressed)
+                while self.size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return compressed
+
+    def __len__(self):
+        return len(self._entries)
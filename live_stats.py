@@ -0,0 +1,175 @@
+"""Today's counters kept in memory and pushed to admins as server-sent events.
+
+``start_game`` and ``submit_guess`` call ``LiveStats.record`` after their
+transaction commits, so following the stream costs no queries per change.
+The counters are seeded from the ``daily_stats`` row when the day starts,
+and re-read every ``resync`` seconds. The re-read also folds in games played
+on other workers. Changes are coalesced: a publisher checks every
+``interval`` seconds and, if anything changed, encodes one event that every
+subscriber sends as-is. Idle subscribers get a comment every ``heartbeat``
+seconds, so proxies keep the connection open and dead clients are noticed.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date
+
+import daily_stats
+
+log = logging.getLogger(__name__)
+
+
+def format_event(payload, event_id):
+    # Same serialization as jsonify, so the data matches /api/daily-report
+    data = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return f'id: {event_id}\nevent: stats\ndata: {data}\n\n'
+
+
+HEARTBEAT = ': keep-alive\n\n'
+
+
+class LiveStats:
+    """Counters for one day plus the latest encoded event.
+
+    ``load(day)`` returns ``{column: count}`` for ``daily_stats.COUNTER_COLUMNS``.
+    WSGI servers use ``stream()``, which starts one publisher thread per
+    process. An async server runs its own publisher loop around
+    ``needs_load``/``begin_load``/``apply_load``/``publish`` instead.
+    """
+
+    def __init__(self, load, interval=1.0, heartbeat=15.0, resync=30.0):
+        self._load = load
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.resync = resync
+        self.day = None
+        self.counters = dict.fromkeys(daily_stats.COUNTER_COLUMNS, 0)
+        self.version = 0
+        self.event = None
+        self.sequence = 0
+        self.subscribers = 0
+        self._published_version = None
+        self._loaded_at = None
+        self._loading = None
+        self._lock = threading.Lock()
+        self._published = threading.Condition()
+        self._thread = None
+        self._thread_pid = None
+
+    def record(self, day, **increments):
+        """Add committed ``increments`` to ``day``'s counters."""
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        with self._lock:
+            if day != self.day:
+                return  # not the day being followed; the next load covers it
+            for column, amount in increments.items():
+                self.counters[column] += amount
+            if self._loading is not None:
+                self._loading.append(increments)
+            self.version += 1
+
+    def needs_load(self, today, now):
+        return (self.day != today or self._loaded_at is None
+                or (self.resync and now - self._loaded_at >= self.resync))
+
+    def begin_load(self):
+        with self._lock:
+            self._loading = []
+
+    def apply_load(self, today, counters, now):
+        """Replace the counters with ``counters`` read from the database.
+
+        Increments recorded while the read ran are applied again on top.
+        One that committed before the read is then counted twice until the
+        next resync.
+        """
+        counters = dict(counters)
+        with self._lock:
+            for increments in self._loading or []:
+                for column, amount in increments.items():
+                    counters[column] += amount
+            self._loading = None
+            self._loaded_at = now
+            if today != self.day or counters != self.counters:
+                self.day, self.counters = today, counters
+                self.version += 1
+
+    def publish(self):
+        """Encode a new event if the counters changed; True if one was made."""
+        with self._lock:
+            if self.version == self._published_version:
+                return False
+            version, day, counters = self.version, self.day, dict(self.counters)
+        event = format_event(daily_stats.report(day, counters), version)
+        with self._published:
+            self._published_version = version
+            self.event = event
+            self.sequence += 1
+            self._published.notify_all()
+        return True
+
+    def subscribe(self):
+        with self._published:
+            self.subscribers += 1
+
+    def unsubscribe(self):
+        with self._published:
+            self.subscribers -= 1
+
+    def reset_event(self):
+        # Nobody is listening; make the next subscriber wait for a fresh event
+        with self._published:
+            self.event = None
+            self._published_version = None
+
+    def tick(self, today=None, now=None):
+        today = today or date.today()
+        now = time.monotonic() if now is None else now
+        if self.needs_load(today, now):
+            self.begin_load()
+            self.apply_load(today, self._load(today), now)
+        return self.publish()
+
+    def _ensure_thread(self):
+        if self._thread is None or self._thread_pid != os.getpid():
+            with self._lock:
+                if self._thread is None or self._thread_pid != os.getpid():
+                    self._thread = threading.Thread(target=self._run, name='live-stats',
+                                                    daemon=True)
+                    self._thread_pid = os.getpid()
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            if self.subscribers:
+                try:
+                    self.tick()
+                except Exception:
+                    # e.g. database busy; subscribers keep the last event
+                    log.exception('Live stats update failed')
+            else:
+                self.reset_event()
+            time.sleep(self.interval)
+
+    def stream(self):
+        """Blocking generator of SSE text for one subscriber."""
+        self._ensure_thread()
+        self.subscribe()
+        try:
+            yield f'retry: {int(self.interval * 1000)}\n\n'
+            sent = None
+            while True:
+                with self._published:
+                    if self.event is None or self.sequence == sent:
+                        self._published.wait(self.heartbeat)
+                    event, sequence = self.event, self.sequence
+                if event is not None and sequence != sent:
+                    sent = sequence
+                    yield event
+                else:
+                    yield HEARTBEAT
+        finally:
+            self.unsubscribe()
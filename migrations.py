@@ -0,0 +1,164 @@
+"""Versioned schema migrations for the SQLite database.
+
+The applied version is kept in ``PRAGMA user_version``. Each migration runs
+in its own transaction together with the version bump, and is written to
+be safe on databases where ``create_all`` already produced part of the
+target schema (fresh installs) as well as on older ``game.db`` files.
+"""
+from sqlalchemy import text
+
+import archive
+import daily_stats
+import quota
+import word_pool
+import word_stats
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def _add_column(conn, table, column, ddl):
+    if column not in _columns(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def current_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def run_migrations(engine, log=None):
+    """Apply pending migrations in order; returns the list applied."""
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        with engine.connect() as conn:
+            # Explicit BEGIN: the driver would otherwise run DDL outside the
+            # transaction, and a failed migration could leave half its schema
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+            if current_version(conn) >= version:
+                conn.rollback()
+                continue
+            fn(conn)
+            conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+            conn.commit()
+        applied.append(version)
+        if log is not None:
+            log(f"Applied migration {version}: {description}")
+    return applied
+
+
+@migration(1, 'indexes for per-user/day game lookups and guess ordering')
+def _add_game_and_guess_indexes(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_game_user_date ON game (user_id, game_date)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_game_date_won ON game (game_date, won)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_guess_game_number ON guess (game_id, guess_number)"))
+
+
+@migration(2, 'denormalized guesses_used and completed on game')
+def _add_game_progress_columns(conn):
+    _add_column(conn, 'game', 'guesses_used', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(conn, 'game', 'completed', 'BOOLEAN NOT NULL DEFAULT 0')
+    conn.execute(text(
+        "UPDATE game SET guesses_used = "
+        "(SELECT COUNT(*) FROM guess WHERE guess.game_id = game.id)"))
+    conn.execute(text(
+        "UPDATE game SET completed = CASE "
+        "WHEN won = 1 OR guesses_used >= 5 THEN 1 ELSE 0 END"))
+
+
+@migration(3, 'daily_stats rollup table, backfilled from game history')
+def _add_daily_stats(conn):
+    conn.execute(daily_stats.CREATE_SQL)
+    daily_stats.rebuild(conn)
+
+
+@migration(4, 'word_stats analytics tables')
+def _add_word_stats(conn):
+    for statement in word_stats.CREATE_SQL:
+        conn.execute(statement)
+
+
+@migration(5, 'archive_chunk and archive_index for archived games')
+def _add_archive_tables(conn):
+    for statement in archive.CREATE_SQL:
+        conn.execute(statement)
+
+
+@migration(6, 'daily_quota reservations, backfilled from game history')
+def _add_daily_quota(conn):
+    conn.execute(quota.CREATE_SQL)
+    conn.execute(text(
+        "INSERT OR IGNORE INTO daily_quota (user_id, quota_date, games_started) "
+        "SELECT user_id, game_date, COUNT(*) FROM game GROUP BY user_id, game_date"))
+
+
+def _sql_word_code(column):
+    # word_pool.encode_word in SQL: base 26, first letter most significant
+    code = '0'
+    for i in range(1, 6):
+        code = f"({code} * 26 + unicode(substr({column}, {i}, 1)) - 65)"
+    return code
+
+
+def _sql_pattern_code(column):
+    # feedback.pattern_from_string in SQL: Y/O/G digits, position i weighs 3**i
+    return ' + '.join(f"(instr('YOG', substr({column}, {i + 1}, 1)) - 1) * {3 ** i}"
+                      for i in range(5))
+
+
+@migration(7, 'compact guess rows: word and feedback codes, clustered by game')
+def _compact_guess_storage(conn):
+    conn.execute(text("DROP INDEX IF EXISTS ix_guess_game_number"))
+    if 'guess_code' in _columns(conn, 'guess'):
+        return  # created by create_all in the compact layout already
+    conn.execute(text(
+        "CREATE TABLE guess_compact ("
+        "game_id INTEGER NOT NULL REFERENCES game (id), "
+        "guess_number INTEGER NOT NULL, "
+        "guess_code INTEGER NOT NULL, "
+        "feedback_code INTEGER NOT NULL, "
+        "created_at INTEGER, "
+        "PRIMARY KEY (game_id, guess_number)) WITHOUT ROWID"))
+    # A plain INSERT: two rows for one (game_id, guess_number) abort the
+    # migration instead of one being dropped
+    conn.execute(text(
+        "INSERT INTO guess_compact "
+        "(game_id, guess_number, guess_code, feedback_code, created_at) "
+        f"SELECT game_id, guess_number, {_sql_word_code('guess_word')}, "
+        f"{_sql_pattern_code('feedback')}, CAST(strftime('%s', created_at) AS INTEGER) "
+        "FROM guess"))
+    # Kept for rolling back to the old layout; drop it (and VACUUM) by hand
+    conn.execute(text("ALTER TABLE guess RENAME TO guess_legacy"))
+    conn.execute(text("ALTER TABLE guess_compact RENAME TO guess"))
+
+
+@migration(8, 'word_version row, bumped by triggers whenever word changes')
+def _add_word_version(conn):
+    for statement in word_pool.VERSION_DDL:
+        conn.execute(text(statement))
+
+
+@migration(9, 'partial index on unfinished games, for report ETags')
+def _add_unfinished_game_index(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_game_unfinished ON game (user_id, game_date) "
+        "WHERE completed = 0"))
+
+
+@migration(10, 'word_stats_late queue for games finished after the mark passed them')
+def _add_word_stats_late(conn):
+    for statement in word_stats.LATE_DDL:
+        conn.execute(text(statement))
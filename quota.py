@@ -0,0 +1,59 @@
+"""Per-user daily game quota in the ``daily_quota`` table.
+
+A reservation is one conditional upsert: the row for (user, day) is
+created at 1 or incremented only while it is below the limit, and
+``RETURNING`` says whether it happened. SQLite runs the statement under
+the write lock, so concurrent ``start_game`` calls from any number of
+workers can never admit more than ``DAILY_GAME_LIMIT`` games.
+"""
+from sqlalchemy import text
+
+DAILY_GAME_LIMIT = 3
+
+CREATE_SQL = text(
+    "CREATE TABLE IF NOT EXISTS daily_quota ("
+    "user_id INTEGER NOT NULL, "
+    "quota_date DATE NOT NULL, "
+    "games_started INTEGER NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (user_id, quota_date))"
+)
+
+# Plain SQL with :named parameters, usable from sqlite3/aiosqlite as well
+RESERVE_SQL = (
+    "INSERT INTO daily_quota (user_id, quota_date, games_started) "
+    "VALUES (:user_id, :quota_date, 1) "
+    "ON CONFLICT(user_id, quota_date) DO UPDATE SET games_started = games_started + 1 "
+    "WHERE games_started < :limit "
+    "RETURNING games_started"
+)
+_RESERVE_SQL = text(RESERVE_SQL)
+
+USED_SQL = (
+    "SELECT games_started FROM daily_quota "
+    "WHERE user_id = :user_id AND quota_date = :quota_date"
+)
+_USED_SQL = text(USED_SQL)
+
+
+def params(user_id, day, limit=DAILY_GAME_LIMIT):
+    return {'user_id': user_id,
+            'quota_date': day.isoformat() if hasattr(day, 'isoformat') else day,
+            'limit': limit}
+
+
+def reserve(session, user_id, day, limit=DAILY_GAME_LIMIT):
+    """Take one game from the user's quota for ``day``.
+
+    Returns the game's number for the day (1 = first), or None when the
+    quota is used up. Runs in the caller's transaction, so a rollback
+    gives the game back.
+    """
+    return session.execute(_RESERVE_SQL, params(user_id, day, limit)).scalar()
+
+
+def used(session, user_id, day):
+    return session.execute(_USED_SQL, params(user_id, day)).scalar() or 0
+
+
+def remaining(games_started, limit=DAILY_GAME_LIMIT):
+    return max(0, limit - games_started)
@@ -0,0 +1,193 @@
+"""Token-bucket rate limiting for expensive endpoints.
+
+Each rule gives a route a bucket per client, keyed by IP or by user. A
+bucket holds up to ``limit`` tokens and refills at ``limit / period`` per
+second. A request spends one token, or is refused with the number of
+seconds until one is available.
+
+Two backends share the same interface:
+
+``MemoryBackend``
+    An LRU-ordered dict, so lookups and updates are O(1). It is bounded
+    to ``max_keys``, and the least recently used bucket is evicted first.
+    An idle bucket refills completely, so evicting it loses nothing.
+    Limits apply per process.
+
+``SQLiteBackend``
+    One upsert per request against a small SQLite file, so every worker
+    (and the ASGI server) draws from the same buckets.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+SCOPES = ('ip', 'user')
+
+# route=scope:count/period, comma separated; routes are endpoint names
+DEFAULT_RULES = ('register=ip:5/minute,login=ip:20/minute,'
+                 'daily_report=user:60/minute,user_report=user:60/minute')
+
+Rule = namedtuple('Rule', 'scope limit period')
+Decision = namedtuple('Decision', 'allowed limit remaining retry_after reset_after')
+
+
+def parse_rules(spec):
+    """Parse ``route=scope:count/period,...`` into {route: [Rule, ...]}.
+
+    A route may appear more than once to get both an IP and a user limit.
+    """
+    rules = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            route, rest = item.split('=', 1)
+            scope, rate = rest.split(':', 1)
+            count, period = rate.split('/', 1)
+            rule = Rule(scope.strip(), int(count), PERIODS[period.strip()])
+        except (ValueError, KeyError):
+            raise ValueError(f'Invalid rate limit rule: {item!r}')
+        if rule.scope not in SCOPES or rule.limit < 1:
+            raise ValueError(f'Invalid rate limit rule: {item!r}')
+        rules.setdefault(route.strip(), []).append(rule)
+    return rules
+
+
+def _decide(tokens, rule, allowed):
+    rate = rule.limit / rule.period
+    return Decision(
+        allowed=allowed,
+        limit=rule.limit,
+        remaining=max(0, int(tokens)),
+        retry_after=0 if allowed else math.ceil((1 - tokens) / rate),
+        reset_after=math.ceil((rule.limit - tokens) / rate))
+
+
+class MemoryBackend:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def take(self, key, rule, now=None):
+        now = time.monotonic() if now is None else now
+        rate = rule.limit / rule.period
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(rule.limit), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(rule.limit, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            allowed = bucket[0] >= 1
+            if allowed:
+                bucket[0] -= 1
+            return _decide(bucket[0], rule, allowed)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBackend:
+    """Buckets in a SQLite file shared by every worker on the host.
+
+    A take is one conditional upsert: the refilled bucket is charged only if
+    it holds a whole token, and ``RETURNING`` reports the result. Buckets
+    idle for longer than ``idle_seconds`` are deleted every
+    ``sweep_every`` takes.
+    """
+
+    _TAKE_SQL = (
+        "INSERT INTO rate_bucket (key, tokens, updated) VALUES (:key, :limit - 1, :now) "
+        "ON CONFLICT(key) DO UPDATE SET "
+        "tokens = MIN(:limit, tokens + (:now - updated) * :rate) - 1, updated = :now "
+        "WHERE MIN(:limit, tokens + (:now - updated) * :rate) >= 1 "
+        "RETURNING tokens")
+
+    _PEEK_SQL = (
+        "SELECT MIN(:limit, tokens + (:now - updated) * :rate) FROM rate_bucket WHERE key = :key")
+
+    def __init__(self, path, busy_timeout_ms=1000, idle_seconds=86400, sweep_every=1000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.idle_seconds = idle_seconds
+        self.sweep_every = sweep_every
+        # One connection per thread; the sweep counter is shared
+        self._local = threading.local()
+        self._takes = 0
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_bucket ("
+                         "key TEXT NOT NULL PRIMARY KEY, tokens REAL NOT NULL, "
+                         "updated REAL NOT NULL) WITHOUT ROWID")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key, rule, now=None):
+        # Wall clock: buckets are shared between processes
+        now = time.time() if now is None else now
+        params = {'key': key, 'limit': rule.limit, 'rate': rule.limit / rule.period, 'now': now}
+        conn = self._conn()
+        row = conn.execute(self._TAKE_SQL, params).fetchone()
+        with self._lock:
+            self._takes += 1
+            sweep = self._takes % self.sweep_every == 0
+        if sweep:
+            conn.execute("DELETE FROM rate_bucket WHERE updated < ?", (now - self.idle_seconds,))
+        if row is not None:
+            return _decide(row[0], rule, True)
+        tokens = conn.execute(self._PEEK_SQL, params).fetchone()
+        return _decide(tokens[0] if tokens else 0.0, rule, False)
+
+
+class RateLimiter:
+    """Applies ``rules`` ({route: [Rule]}) on top of a backend."""
+
+    def __init__(self, backend, rules):
+        self.backend = backend
+        self.rules = rules
+
+    def check(self, route, ip, user_id=None):
+        """Charge every bucket for ``route``.
+
+        Returns the refusing Decision, or the tightest allowing one, or None
+        when the route has no rules. User-scoped rules fall back to the IP
+        for anonymous requests.
+        """
+        rules = self.rules.get(route)
+        if not rules:
+            return None
+        tightest = None
+        for rule in rules:
+            who = f'u{user_id}' if rule.scope == 'user' and user_id is not None else f'ip{ip}'
+            decision = self.backend.take(f'{route}:{rule.scope}:{who}', rule)
+            if not decision.allowed:
+                return decision
+            if tightest is None or decision.remaining < tightest.remaining:
+                tightest = decision
+        return tightest
+
+
+def headers(decision):
+    """Standard rate limit response headers for ``decision``."""
+    out = {
+        'RateLimit-Limit': str(decision.limit),
+        'RateLimit-Remaining': str(decision.remaining),
+        'RateLimit-Reset': str(decision.reset_after),
+    }
+    if not decision.allowed:
+        out['Retry-After'] = str(decision.retry_after)
+    return out
@@ -0,0 +1,260 @@
+"""Hint engine: ranks next guesses by expected information gain.
+
+Built on a words x words uint8 matrix of feedback pattern codes, where
+``matrix[g, s]`` is ``feedback.score(secret=words[s], guess=words[g])``.
+The matrix is saved as a ``.npy`` file and opened with ``mmap_mode='r'``,
+so every worker shares the same pages through the OS cache. When the answer
+list changes, only the rows and columns for newly added words are scored;
+everything else is copied from the previous matrix.
+"""
+import contextlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: unique temp names still keep writers apart
+    fcntl = None
+
+import feedback as fb
+
+# Rows scored per NumPy call while building; bounds peak memory
+BUILD_BLOCK_PAIRS = 2_000_000
+
+
+class StaleMatrixError(LookupError):
+    """The matrix on disk was built for a different answer list."""
+
+
+def _words_path(path):
+    return path + '.words.npy'
+
+
+@contextlib.contextmanager
+def _file_lock(path, exclusive):
+    # Writers hold it exclusively while building and replacing the files;
+    # readers hold it shared while loading, so they never pair new words
+    # with an old matrix
+    if fcntl is None:
+        yield
+        return
+    with open(path + '.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _save_temp(directory, array):
+    """Save ``array`` under a name unique to this writer; returns the path."""
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp.npy')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+        os.chmod(tmp_path, 0o644)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def _score_block(guess_letters, secret_letters):
+    """Patterns for every guess row against every secret column."""
+    rows, cols = len(guess_letters), len(secret_letters)
+    out = np.empty((rows, cols), dtype=np.uint8)
+    step = max(1, BUILD_BLOCK_PAIRS // max(cols, 1))
+    for start in range(0, rows, step):
+        block = guess_letters[start:start + step]
+        guesses = np.repeat(block, cols, axis=0)
+        secrets = np.tile(secret_letters, (len(block), 1))
+        out[start:start + len(block)] = fb.score_arrays(secrets, guesses).reshape(len(block), cols)
+    return out
+
+
+def build_matrix(words, previous_words=None, previous_matrix=None):
+    """Feedback matrix for sorted ``words``, reusing a previous matrix if given."""
+    letters = fb.encode_words(words)
+    n = len(words)
+    matrix = np.empty((n, n), dtype=np.uint8)
+
+    old_index = {}
+    if previous_words is not None and previous_matrix is not None:
+        old_index = {w: i for i, w in enumerate(previous_words)}
+    kept_new = np.array([i for i, w in enumerate(words) if w in old_index], dtype=np.intp)
+    kept_old = np.array([old_index[words[i]] for i in kept_new], dtype=np.intp)
+    added = np.array([i for i, w in enumerate(words) if w not in old_index], dtype=np.intp)
+
+    if len(kept_new):
+        matrix[np.ix_(kept_new, kept_new)] = previous_matrix[np.ix_(kept_old, kept_old)]
+    if len(added):
+        # Added guesses against every secret, then kept guesses against added secrets
+        matrix[added, :] = _score_block(letters[added], letters)
+        if len(kept_new):
+            matrix[np.ix_(kept_new, added)] = _score_block(letters[kept_new], letters[added])
+    return matrix, len(added)
+
+
+class FeedbackMatrix:
+    """Memory-mapped feedback matrix plus its word index."""
+
+    def __init__(self, path):
+        self.path = path
+        self.words = []
+        self.index = {}
+        self.letters = None
+        self.matrix = None
+        self.generation = None
+        self._identity = None
+        self._lock = threading.Lock()
+        self._opening_cache = None
+        self._open()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns
+
+    def _open(self):
+        if not (os.path.exists(self.path) and os.path.exists(_words_path(self.path))):
+            return
+        with _file_lock(self.path, exclusive=False):
+            self._load()
+
+    def _load(self):
+        words = [w.decode('ascii') for w in np.load(_words_path(self.path))]
+        self._identity = self._stat()
+        self.matrix = np.load(self.path, mmap_mode='r')
+        self.words = words
+        self.index = {w: i for i, w in enumerate(words)}
+        self.letters = fb.encode_words(words)
+        self._opening_cache = None
+
+    def _refresh_if_replaced(self):
+        # Another process may have rebuilt the file; remap if so
+        identity = self._stat()
+        if identity is not None and identity != self._identity:
+            self._open()
+
+    def sync(self, words, generation=None):
+        """Make the matrix match ``words``; returns the number of words scored.
+
+        No-op when ``generation`` matches the last sync. Otherwise the word
+        set is compared with the file on disk and only added words are
+        scored; the new matrix replaces the file atomically. Concurrent
+        builders take turns on a lock file, and each writes its own temp
+        files.
+        """
+        with self._lock:
+            if generation is not None and generation == self.generation:
+                return 0
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with _file_lock(self.path, exclusive=True):
+                if os.path.exists(self.path) and self._stat() != self._identity:
+                    self._load()
+                words = sorted(set(words))
+                if words == self.words:
+                    self.generation = generation
+                    return 0
+                matrix, scored = build_matrix(words, self.words, self.matrix)
+                tmp_words = _save_temp(directory, np.array(words, dtype='S5'))
+                tmp_path = _save_temp(directory, matrix)
+                # Words first: a reader that sees the new matrix also sees its words
+                os.replace(tmp_words, _words_path(self.path))
+                os.replace(tmp_path, self.path)
+                self._load()
+            self.generation = generation
+            return scored
+
+    def patterns_for_guess(self, guess):
+        """Pattern codes of ``guess`` against every word (column order)."""
+        i = self.index.get(guess)
+        if i is not None:
+            return np.asarray(self.matrix[i])
+        guesses = np.repeat(fb.encode_words([guess]), len(self.words), axis=0)
+        return fb.score_arrays(self.letters, guesses)
+
+    def candidates(self, history):
+        """Column indexes of words consistent with ``history``.
+
+        ``history`` is a list of ``(guess_word, pattern_code)`` pairs.
+        """
+        mask = np.ones(len(self.words), dtype=bool)
+        for guess, pattern in history:
+            mask &= self.patterns_for_guess(guess) == pattern
+        return np.flatnonzero(mask)
+
+    def expected_information(self, candidate_idx):
+        """Expected bits of information for every word as the next guess.
+
+        Over ``c`` candidates, a guess whose patterns occur ``k`` times each
+        has entropy ``log2(c) - sum(k * log2(k)) / c``. Each block of guess
+        rows is radix-sorted (``kind='stable'`` on uint8), the runs of equal
+        patterns are measured, and their ``k * log2(k)`` comes from a lookup
+        table, so nothing is widened past one byte per cell or histogrammed
+        over all 243 patterns.
+        """
+        n, c = len(self.words), len(candidate_idx)
+        xlogx = np.zeros(c + 1)
+        xlogx[1:] = np.arange(1, c + 1) * np.log2(np.arange(1, c + 1))
+        info = np.empty(n, dtype=np.float64)
+        step = max(1, BUILD_BLOCK_PAIRS // c)
+        for start in range(0, n, step):
+            block = np.asarray(self.matrix[start:start + step]).take(candidate_idx, axis=1)
+            rows = len(block)
+            block.sort(axis=1, kind='stable')
+            # Flat positions where a run ends; every row's last cell is one,
+            # so runs never span rows
+            ends = np.ones((rows, c), dtype=bool)
+            np.not_equal(block[:, 1:], block[:, :-1], out=ends[:, :-1])
+            ends = np.flatnonzero(ends)
+            runs = np.diff(ends, prepend=-1)
+            totals = np.bincount(ends // c, weights=xlogx[runs], minlength=rows)
+            info[start:start + rows] = np.log2(c) - totals / c
+        return info
+
+    def rank(self, history, top=5, word_count=None, target=None):
+        """Best next guesses for ``history`` and the remaining candidates.
+
+        Raises StaleMatrixError when the matrix doesn't hold ``word_count``
+        words or lacks ``target``, rather than rank over the wrong answers.
+        """
+        # Held throughout so a concurrent sync can't swap the matrix mid-rank
+        with self._lock:
+            self._refresh_if_replaced()
+            if self.matrix is None:
+                raise LookupError('Feedback matrix has not been built')
+            if ((word_count is not None and word_count != len(self.words))
+                    or (target is not None and target not in self.index)):
+                raise StaleMatrixError('Feedback matrix is out of date')
+            return self._rank(history, top)
+
+    def _rank(self, history, top):
+
+        candidate_idx = self.candidates(history)
+        if len(candidate_idx) == 0:
+            return [], []
+
+        if not history and self._opening_cache is not None:
+            info = self._opening_cache
+        else:
+            info = self.expected_information(candidate_idx)
+            if not history:
+                self._opening_cache = info
+
+        # A word that could be the answer also has a 1/c chance of winning
+        # outright, which breaks ties in its favour
+        is_candidate = np.zeros(len(self.words), dtype=bool)
+        is_candidate[candidate_idx] = True
+        scores = info + is_candidate / len(candidate_idx)
+
+        best = np.argsort(-scores, kind='stable')[:top]
+        ranked = [{
+            'word': self.words[i],
+            'expected_information_bits': round(float(info[i]), 4),
+            'is_candidate': bool(is_candidate[i])
+        } for i in best.tolist()]
+        return ranked, [self.words[i] for i in candidate_idx.tolist()]
@@ -0,0 +1,161 @@
+"""SQLite storage settings: per-connection pragmas, pool sizing and an
+optional group-commit writer that batches small write transactions.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlalchemy import event
+
+
+def is_sqlite_file(url):
+    return url.startswith('sqlite') and ':memory:' not in url and url not in ('sqlite://', 'sqlite:///')
+
+
+def engine_options(url, pool_size=10, max_overflow=20, pool_timeout=10, busy_timeout_ms=5000):
+    """SQLAlchemy engine options for ``url``.
+
+    For file-backed SQLite the connections are shared between request
+    threads via a QueuePool, so ``check_same_thread`` is turned off and the
+    driver-level lock timeout matches ``busy_timeout``.
+    """
+    if not is_sqlite_file(url):
+        return {}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'connect_args': {
+            'check_same_thread': False,
+            'timeout': busy_timeout_ms / 1000,
+        },
+    }
+
+
+def sqlite_pragmas(wal=True, busy_timeout_ms=5000, synchronous='NORMAL',
+                   mmap_size=256 * 1024 * 1024):
+    """PRAGMA statements to run on each new connection.
+
+    WAL lets readers run alongside the single writer; with it,
+    ``synchronous=NORMAL`` only fsyncs at checkpoints, which is still safe
+    against application crashes.
+    """
+    pragmas = ['PRAGMA journal_mode=WAL'] if wal else []
+    pragmas += [
+        f'PRAGMA busy_timeout={int(busy_timeout_ms)}',
+        f'PRAGMA synchronous={synchronous}',
+        f'PRAGMA mmap_size={int(mmap_size)}',
+    ]
+    return pragmas
+
+
+def install_sqlite_pragmas(engine, **settings):
+    """Apply sqlite_pragmas(**settings) to every new DBAPI connection."""
+    pragmas = sqlite_pragmas(**settings)
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return _set_pragmas
+
+
+class GroupCommitWriter:
+    """Batches write callbacks from many threads into one transaction.
+
+    ``submit(fn)`` queues ``fn(connection)`` and blocks until the batch it
+    landed in has committed, then returns ``fn``'s result. A background
+    thread takes up to ``max_batch`` callbacks, waiting at most
+    ``max_delay`` seconds after the first one for more to arrive, and runs
+    them in a single ``BEGIN IMMEDIATE`` transaction. Each callback runs in
+    its own SAVEPOINT, so one failing callback is rolled back and re-raised
+    to its caller without affecting the rest of the batch.
+    """
+
+    def __init__(self, engine, max_batch=64, max_delay=0.002):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        if self._thread is None or self._thread_pid != os.getpid():
+            with self._lock:
+                if self._thread is None or self._thread_pid != os.getpid():
+                    self._queue = queue.Queue()
+                    self._thread = threading.Thread(target=self._run, name='group-commit',
+                                                    daemon=True)
+                    self._thread_pid = os.getpid()
+                    self._thread.start()
+
+    def submit(self, fn, timeout=None):
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((fn, future))
+        return future.result(timeout=timeout)
+
+    def close(self):
+        if self._thread is not None and self._thread_pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._flush(batch)
+                    return
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch):
+        outcomes = []
+        try:
+            with self.engine.connect() as conn:
+                # Explicit BEGIN so the savepoints below nest inside one
+                # transaction instead of each committing on RELEASE
+                conn.exec_driver_sql('BEGIN IMMEDIATE')
+                for fn, future in batch:
+                    savepoint = conn.begin_nested()
+                    try:
+                        result = fn(conn)
+                    except Exception as exc:
+                        savepoint.rollback()
+                        outcomes.append((future, False, exc))
+                    else:
+                        savepoint.commit()
+                        outcomes.append((future, True, result))
+                conn.commit()
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
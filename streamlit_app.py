@@ -1,7 +1,7 @@
+import time
+
 import streamlit as st
-import requests
-from collections import Counter
-import json
+from api_client import ApiClient
 
 # API base URL
 API_BASE = "http://localhost:5000/api"
@@ -13,100 +13,18 @@ if 'username' not in st.session_state:
     st.session_state.username = None
 if 'role' not in st.session_state:
     st.session_state.role = None
-if 'current_game' not in st.session_state:
-    st.session_state.current_game = None
-if 'target_word' not in st.session_state:
-    st.session_state.target_word = None
-if 'guesses' not in st.session_state:
-    st.session_state.guesses = []
-
-def register_user(username, password):
-    try:
-        response = requests.post(f"{API_BASE}/register", json={
-            'username': username,
-            'password': password
-        })
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {'error': f"Error {response.status_code}: {response.text}"}
-    except requests.exceptions.RequestException as e:
-        return {'error': f"Could not connect to server: {e}"}
+if 'token' not in st.session_state:
+    st.session_state.token = None
+if 'celebrated_game' not in st.session_state:
+    st.session_state.celebrated_game = None
 
-
-def login_user(username, password):
-    try:
-        response = requests.post(f"{API_BASE}/login", json={
-            'username': username,
-            'password': password
-        })
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {'error': f"Error {response.status_code}: {response.text}"}
-    except requests.exceptions.RequestException as e:
-        return {'error': f"Could not connect to server: {e}"}
+@st.cache_resource
+def get_api_client():
+    # Shared across reruns and sessions so connections stay pooled
+    return ApiClient(API_BASE)
 
 
-def start_new_game(user_id):
-    try:
-        response = requests.post(f"{API_BASE}/start-game", json={
-            'user_id': user_id
-        })
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {'error': f"Error {response.status_code}: {response.text}"}
-    except requests.exceptions.RequestException as e:
-        return {'error': f"Could not connect to server: {e}"}
-
-
-def submit_guess(game_id, guess_word, user_id):
-    try:
-        response = requests.post(f"{API_BASE}/submit-guess", json={
-            'game_id': game_id,
-            'guess_word': guess_word,
-            'user_id': user_id
-        })
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {'error': f"Error {response.status_code}: {response.text}"}
-    except requests.exceptions.RequestException as e:
-        return {'error': f"Could not connect to server: {e}"}
-
-
-def get_daily_report(report_date):
-    try:
-        response = requests.get(f"{API_BASE}/daily-report?date={report_date}")
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {'error': f"Error {response.status_code}: {response.text}"}
-    except requests.exceptions.RequestException as e:
-        return {'error': f"Could not connect to server: {e}"}
-
-
-def get_user_report(username):
-    try:
-        response = requests.get(f"{API_BASE}/user-report?username={username}")
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {'error': f"Error {response.status_code}: {response.text}"}
-    except requests.exceptions.RequestException as e:
-        return {'error': f"Could not connect to server: {e}"}
-
-
-def get_game_status(user_id):
-    try:
-        response = requests.get(f"{API_BASE}/game-status?user_id={user_id}")
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {'error': f"Error {response.status_code}: {response.text}"}
-    except requests.exceptions.RequestException as e:
-        return {'error': f"Could not connect to server: {e}"}
+api = get_api_client()
 
 
 def display_guess_grid(guesses):
@@ -138,6 +56,9 @@ def display_guess_grid(guesses):
 st.set_page_config(page_title="Guess the Word", page_icon="🎯", layout="wide")
 st.title("🎯 Guess the Word Game")
 
+# Player state for this rerun, fetched once from /api/session-state
+state = None
+
 # Sidebar for authentication
 with st.sidebar:
     st.header("🔐 Authentication")
@@ -150,13 +71,14 @@ with st.sidebar:
             password = st.text_input("Password", type="password", key="login_pass")
             
             if st.button("Login", use_container_width=True):
-                result = login_user(username, password)
+                result = api.login(username, password)
                 if 'error' in result:
                     st.error(result['error'])
                 else:
                     st.session_state.user_id = result['user_id']
                     st.session_state.username = result['username']
                     st.session_state.role = result['role']
+                    st.session_state.token = result['token']
                     st.success(f"Welcome {result['username']}!")
                     st.rerun()
         
@@ -166,7 +88,7 @@ with st.sidebar:
                                    type="password", key="reg_pass")
             
             if st.button("Register", use_container_width=True):
-                result = register_user(new_user, new_pass)
+                result = api.register(new_user, new_pass)
                 if 'error' in result:
                     st.error(result['error'])
                 else:
@@ -177,18 +99,17 @@ with st.sidebar:
         st.info(f"Role: {st.session_state.role}")
         
         # Game status
-        status = get_game_status(st.session_state.user_id)
-        if 'error' not in status:
-            st.metric("Games Played Today", status['games_played_today'])
-            st.metric("Games Remaining", status['games_remaining'])
+        state = api.session_state(st.session_state.token)
+        if 'error' not in state:
+            st.metric("Games Played Today", state['games_played_today'])
+            st.metric("Games Remaining", state['games_remaining'])
         
         if st.button("Logout", use_container_width=True):
             st.session_state.user_id = None
             st.session_state.username = None
             st.session_state.role = None
-            st.session_state.current_game = None
-            st.session_state.target_word = None
-            st.session_state.guesses = []
+            st.session_state.token = None
+            st.session_state.celebrated_game = None
             st.rerun()
 
 # Main content
@@ -200,87 +121,87 @@ if st.session_state.role == 'player':
     # Player interface
     st.header("🎮 Play Game")
     
-    if st.session_state.current_game is None:
-        status = get_game_status(st.session_state.user_id)
-        if 'error' in status:
-            st.error(status['error'])
-        else:
-            if status['games_remaining'] > 0:
-                st.info(f"You have {status['games_remaining']} games remaining today")
-                if st.button("Start New Game", type="primary"):
-                    result = start_new_game(st.session_state.user_id)
-                    if 'error' in result:
-                        st.error(result['error'])
-                    else:
-                        st.session_state.current_game = result['game_id']
-                        st.session_state.target_word = result['target_word']
-                        st.session_state.guesses = []
-                        st.rerun()
+    if 'error' in state:
+        st.error(state['error'])
+        st.stop()
+    
+    active = state['active_game']
+    last = state['last_completed_game']
+    
+    if active is None:
+        if last is not None:
+            if last['won']:
+                if st.session_state.celebrated_game != last['game_id']:
+                    st.session_state.celebrated_game = last['game_id']
+                    st.balloons()
+                st.success("🎉 Congratulations! You guessed the word correctly!")
             else:
-                st.warning("You've reached your daily limit of 3 games. Come back tomorrow!")
+                st.error(f"❌ Game over! The word was: {last['target_word']}")
+            display_guess_grid([(g['guess_word'], g['feedback']) for g in last['guesses']])
+        
+        if state['games_remaining'] > 0:
+            st.info(f"You have {state['games_remaining']} games remaining today")
+            if st.button("Start New Game", type="primary"):
+                result = api.start_game(st.session_state.token)
+                if 'error' in result:
+                    st.error(result['error'])
+                else:
+                    st.rerun()
+        else:
+            st.warning("You've reached your daily limit of 3 games. Come back tomorrow!")
     else:
         # Active game
         st.subheader("Make Your Guess")
-        st.info("Enter a 5-letter word (A-Z only)")
+        st.info(f"Enter a 5-letter word (A-Z only). Remaining guesses: {active['remaining_guesses']}")
         
         guess = st.text_input("Your guess:", max_chars=5, key="guess_input").upper()
         
         if st.button("Submit Guess", type="primary", disabled=len(guess) != 5):
-            result = submit_guess(st.session_state.current_game, guess, st.session_state.user_id)
+            result = api.submit_guess(st.session_state.token, active['game_id'], guess)
             if 'error' in result:
                 st.error(result['error'])
             else:
-                st.session_state.guesses.append((guess, result['feedback']))
-                
-                if result['is_correct']:
-                    st.balloons()
-                    st.success("🎉 Congratulations! You guessed the word correctly!")
-                    if st.button("Play Again"):
-                        st.session_state.current_game = None
-                        st.session_state.target_word = None
-                        st.session_state.guesses = []
-                        st.rerun()
-                elif result['game_completed']:
-                    st.error(f"❌ Game over! The word was: {st.session_state.target_word}")
-                    if st.button("Try Again"):
-                        st.session_state.current_game = None
-                        st.session_state.target_word = None
-                        st.session_state.guesses = []
-                        st.rerun()
-                else:
-                    st.info(f"Remaining guesses: {result['remaining_guesses']}")
-                    st.rerun()
+                st.rerun()
         
         # Display previous guesses
-        if st.session_state.guesses:
+        if active['guesses']:
             st.subheader("Your Guesses")
-            display_guess_grid(st.session_state.guesses)
+            display_guess_grid([(g['guess_word'], g['feedback']) for g in active['guesses']])
 
 elif st.session_state.role == 'admin':
     # Admin interface
     st.header("📊 Admin Reports")
     
-    tab1, tab2 = st.tabs(["Daily Report", "User Report"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Daily Report", "User Report", "Word Stats", "Live"])
     
     with tab1:
         st.subheader("Daily Statistics")
         report_date = st.date_input("Select date")
         if st.button("Generate Daily Report"):
-            result = get_daily_report(report_date.isoformat())
+            result = api.daily_report(st.session_state.token, report_date.isoformat())
             if 'error' in result:
                 st.error(result['error'])
             else:
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("Number of Users", result['num_users'])
                 with col2:
+                    st.metric("Games Played", result['games_played'])
+                with col3:
                     st.metric("Correct Guesses", result['num_correct'])
+                st.bar_chart(result['guess_distribution'])
     
     with tab2:
         st.subheader("User Statistics")
         username = st.text_input("Enter username")
         if st.button("Generate User Report"):
-            result = get_user_report(username)
+            st.session_state.report_user = username
+            st.session_state.report_cursors = [None]
+        
+        if st.session_state.get('report_user'):
+            cursors = st.session_state.report_cursors
+            result = api.user_report(st.session_state.token, st.session_state.report_user,
+                                     after=cursors[-1])
             if 'error' in result:
                 st.error(result['error'])
             else:
@@ -290,5 +211,73 @@ elif st.session_state.role == 'admin':
                     import pandas as pd
                     df = pd.DataFrame(result['report'])
                     st.dataframe(df, use_container_width=True)
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if len(cursors) > 1 and st.button("Newer"):
+                            cursors.pop()
+                            st.rerun()
+                    with col2:
+                        if result.get('next_cursor') and st.button("Older"):
+                            cursors.append(result['next_cursor'])
+                            st.rerun()
+                else:
+                    st.info("No games recorded for this user.")
+    
+    with tab3:
+        st.subheader("Word Difficulty")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_labels = {"Games played": "games", "Win rate": "win_rate",
+                           "Average guesses": "avg_guesses", "Word": "word"}
+            sort_by = st.selectbox("Sort by", list(sort_labels))
+        with col2:
+            ascending = st.checkbox("Ascending", value=False)
+        with col3:
+            if st.button("Refresh Statistics"):
+                result = api.refresh_word_stats(st.session_state.token)
+                if 'error' in result:
+                    st.error(result['error'])
                 else:
-                    st.info("No games recorded for this user.")
\ No newline at end of file
+                    st.success(f"Scanned {result['games_scanned']} new games")
+        
+        result = api.word_stats(st.session_state.token, sort=sort_labels[sort_by],
+                                order='asc' if ascending else 'desc')
+        if 'error' in result:
+            st.error(result['error'])
+        elif not result['words']:
+            st.info("No finished games aggregated yet.")
+        else:
+            import pandas as pd
+            df = pd.DataFrame([{
+                'word': row['word'],
+                'games': row['games_completed'],
+                'win_rate': row['win_rate'],
+                'avg_guesses': row['avg_guesses_to_solve'],
+                'top_first_guesses': ', '.join(f"{g['guess']} ({g['times']})"
+                                               for g in row['top_first_guesses'])
+            } for row in result['words']])
+            st.dataframe(df, use_container_width=True)
+            if result['top_first_guesses']:
+                st.caption("Most common first guesses")
+                st.bar_chart({g['guess']: g['times'] for g in result['top_first_guesses']})
+    
+    # Last: while following, this tab blocks the script until the next rerun
+    with tab4:
+        st.subheader("Today, Live")
+        if st.toggle("Follow live"):
+            status = st.empty()
+            metrics_row = st.empty()
+            chart = st.empty()
+            status.caption("Waiting for the first update...")
+            for result in api.live_stats(st.session_state.token):
+                if 'error' in result:
+                    status.error(result['error'])
+                    break
+                status.caption(f"{result['date']} - updated {time.strftime('%H:%M:%S')}")
+                with metrics_row.container():
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("Number of Users", result['num_users'])
+                    col2.metric("Games Played", result['games_played'])
+                    col3.metric("Correct Guesses", result['num_correct'])
+                chart.bar_chart(result['guess_distribution'])
@@ -0,0 +1,102 @@
+import itertools
+import os
+import string
+import sys
+import tempfile
+from collections import namedtuple
+
+import pytest
+
+# The app reads its configuration when it is imported, so set it up first
+_tmp = tempfile.mkdtemp(prefix='game-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    'SECRET_KEY': 'test-secret',
+    'HASH_WORKERS': '0',
+    'RATE_LIMIT_ENABLED': '0',
+    'WORD_STATS_WORKERS': '0',
+    'GUESS_DICTIONARY_PATH': os.path.join(_tmp, 'guesses.bitset'),
+    'FEEDBACK_MATRIX_PATH': os.path.join(_tmp, 'feedback_matrix.npy'),
+    'ARCHIVE_DIR': os.path.join(_tmp, 'archive'),
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as game_app  # noqa: E402
+
+ADMIN = {'username': 'admin', 'password': 'adminpass@123'}
+PASSWORD = 'abc1$'
+
+Reply = namedtuple('Reply', 'status_code json headers')
+
+_names = itertools.count()
+
+
+@pytest.fixture(scope='session', autouse=True)
+def database():
+    game_app.init_db()
+    yield
+    game_app.password_hasher.shutdown()
+
+
+class FlaskClient:
+    def __init__(self):
+        self._client = game_app.app.test_client()
+
+    def request(self, method, path, json=None, headers=None):
+        response = self._client.open(path, method=method, json=json, headers=headers)
+        return Reply(response.status_code, response.get_json(silent=True), response.headers)
+
+
+class AsgiClient:
+    def __init__(self, client):
+        self._client = client
+
+    def request(self, method, path, json=None, headers=None):
+        response = self._client.request(method, path, json=json, headers=headers)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return Reply(response.status_code, body, response.headers)
+
+
+@pytest.fixture(params=['flask', 'asgi'])
+def client(request):
+    """The same requests against the Flask app and the ASGI mirror."""
+    if request.param == 'flask':
+        yield FlaskClient()
+        return
+    from starlette.testclient import TestClient
+    import asgi_app
+    with TestClient(asgi_app.app) as test_client:
+        yield AsgiClient(test_client)
+
+
+def unique_name():
+    # Usernames are letters only
+    n = next(_names)
+    suffix = ''
+    for _ in range(4):
+        n, rem = divmod(n, 26)
+        suffix = string.ascii_lowercase[rem] + suffix
+    return 'player' + suffix
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def player(client):
+    """A freshly registered player: ``(username, user_id, headers)``."""
+    username = unique_name()
+    reply = client.request('POST', '/api/register', {'username': username, 'password': PASSWORD})
+    assert reply.status_code == 200
+    reply = client.request('POST', '/api/login', {'username': username, 'password': PASSWORD})
+    return username, reply.json['user_id'], bearer(reply.json['token'])
+
+
+@pytest.fixture
+def admin(client):
+    reply = client.request('POST', '/api/login', ADMIN)
+    return bearer(reply.json['token'])
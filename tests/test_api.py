@@ -0,0 +1,260 @@
+from datetime import date
+
+from conftest import PASSWORD, game_app, unique_name
+
+TODAY = date.today().isoformat()
+
+
+def start(client, headers):
+    return client.request('POST', '/api/start-game', {}, headers)
+
+
+def guess(client, headers, game_id, word):
+    return client.request('POST', '/api/submit-guess', {'game_id': game_id, 'guess_word': word},
+                          headers)
+
+
+def test_register(client):
+    username = unique_name()
+    reply = client.request('POST', '/api/register', {'username': username, 'password': PASSWORD})
+    assert reply.status_code == 200
+    assert reply.json['message'] == 'Registration successful'
+    assert isinstance(reply.json['user_id'], int)
+
+    reply = client.request('POST', '/api/register', {'username': username, 'password': PASSWORD})
+    assert (reply.status_code, reply.json) == (400, {'error': 'Username already exists'})
+
+
+def test_register_validates(client):
+    reply = client.request('POST', '/api/register', {'username': 'ab', 'password': PASSWORD})
+    assert reply.status_code == 400
+    assert reply.json == {'error': 'Username must be at least 5 letters (A-Z, a-z only)'}
+
+    reply = client.request('POST', '/api/register', {'username': unique_name(),
+                                                     'password': 'abcde1'})
+    assert reply.status_code == 400
+    assert reply.json == {
+        'error': 'Password must contain at least one special character ($, %, *, @)'}
+
+
+def test_login(client, player):
+    username, user_id, _ = player
+    reply = client.request('POST', '/api/login', {'username': username, 'password': PASSWORD})
+    assert reply.status_code == 200
+    assert reply.json['message'] == 'Login successful'
+    assert reply.json['user_id'] == user_id
+    assert reply.json['username'] == username
+    assert reply.json['role'] == 'player'
+    assert reply.json['token'] and reply.json['expires_at']
+
+    reply = client.request('POST', '/api/login', {'username': username, 'password': 'wrong1$'})
+    assert (reply.status_code, reply.json) == (401, {'error': 'Invalid username or password'})
+
+
+def test_game_status(client, player):
+    _, _, headers = player
+    reply = client.request('GET', '/api/game-status', headers=headers)
+    assert reply.status_code == 200
+    assert reply.json == {'games_played_today': 0, 'games_remaining': 3}
+
+    start(client, headers)
+    reply = client.request('GET', '/api/game-status', headers=headers)
+    assert reply.json == {'games_played_today': 1, 'games_remaining': 2}
+
+    reply = client.request('GET', '/api/game-status')
+    assert (reply.status_code, reply.json) == (401, {'error': 'Valid token required'})
+
+
+def test_start_game(client, player):
+    _, _, headers = player
+    for _ in range(3):
+        reply = start(client, headers)
+        assert reply.status_code == 200
+        assert set(reply.json) == {'game_id', 'target_word', 'remaining_guesses'}
+        assert len(reply.json['target_word']) == 5
+        assert reply.json['remaining_guesses'] == 5
+
+    reply = start(client, headers)
+    assert (reply.status_code, reply.json) == (400, {'error': 'Daily limit reached (3 games per day)'})
+
+
+def test_submit_guess(client, player):
+    _, _, headers = player
+    game = start(client, headers).json
+    target = game['target_word']
+    miss = 'CRANE' if target != 'CRANE' else 'SLOTH'
+
+    reply = guess(client, headers, game['game_id'], miss.lower())
+    assert reply.status_code == 200
+    assert reply.json['is_correct'] is False
+    assert reply.json['game_completed'] is False
+    assert reply.json['remaining_guesses'] == 4
+    assert len(reply.json['feedback']) == 5
+    assert set(reply.json['feedback']) <= {'green', 'orange', 'gray'}
+
+    reply = guess(client, headers, game['game_id'], target)
+    assert reply.status_code == 200
+    assert reply.json == {'feedback': ['green'] * 5, 'is_correct': True,
+                          'remaining_guesses': 0, 'game_completed': True}
+
+    reply = guess(client, headers, game['game_id'], target)
+    assert (reply.status_code, reply.json) == (400, {'error': 'Game already completed'})
+
+
+def test_submit_guess_errors(client, player):
+    _, _, headers = player
+    game_id = start(client, headers).json['game_id']
+
+    reply = guess(client, headers, game_id, 'AB')
+    assert (reply.status_code, reply.json) == (
+        400, {'error': 'Guess must be exactly 5 uppercase letters'})
+
+    reply = client.request('POST', '/api/submit-guess', {'game_id': game_id}, headers)
+    assert (reply.status_code, reply.json) == (400, {'error': 'Missing required fields'})
+
+    reply = guess(client, headers, 10 ** 9, 'CRANE')
+    assert (reply.status_code, reply.json) == (404, {'error': 'Game not found'})
+
+
+def test_submit_guess_other_players_game(client, player):
+    _, _, headers = player
+    game_id = start(client, headers).json['game_id']
+    other = unique_name()
+    client.request('POST', '/api/register', {'username': other, 'password': PASSWORD})
+    token = client.request('POST', '/api/login', {'username': other, 'password': PASSWORD}).json
+    reply = guess(client, {'Authorization': f"Bearer {token['token']}"}, game_id, 'CRANE')
+    assert (reply.status_code, reply.json) == (404, {'error': 'Game not found'})
+
+
+def test_daily_report(client, player, admin):
+    _, _, headers = player
+    before = client.request('GET', '/api/daily-report', headers=admin)
+    assert before.status_code == 200
+    assert before.json['date'] == TODAY
+    assert set(before.json) == {'date', 'num_users', 'num_correct', 'games_played',
+                                'guess_distribution'}
+
+    game = start(client, headers).json
+    guess(client, headers, game['game_id'], game['target_word'])
+
+    after = client.request('GET', '/api/daily-report', headers=admin)
+    assert after.status_code == 200
+    assert after.json['games_played'] == before.json['games_played'] + 1
+    assert after.json['num_users'] == before.json['num_users'] + 1
+    assert after.json['num_correct'] == before.json['num_correct'] + 1
+    assert after.json['guess_distribution']['1'] == before.json['guess_distribution']['1'] + 1
+
+
+def test_daily_report_past_day(client, admin):
+    reply = client.request('GET', '/api/daily-report?date=2020-01-01', headers=admin)
+    assert reply.status_code == 200
+    assert reply.json == {
+        'date': '2020-01-01', 'num_users': 0, 'num_correct': 0, 'games_played': 0,
+        'guess_distribution': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0, 'failed': 0}}
+
+    reply = client.request('GET', '/api/daily-report?date=bad', headers=admin)
+    assert (reply.status_code, reply.json) == (
+        400, {'error': 'Invalid date format. Use YYYY-MM-DD'})
+
+
+def test_reports_need_admin(client, player):
+    _, _, headers = player
+    for path in ('/api/daily-report', '/api/user-report?username=admin'):
+        reply = client.request('GET', path, headers=headers)
+        assert (reply.status_code, reply.json) == (403, {'error': 'Forbidden'})
+
+
+def test_user_report(client, player, admin):
+    username, _, headers = player
+    game = start(client, headers).json
+    guess(client, headers, game['game_id'], game['target_word'])
+    start(client, headers)
+
+    reply = client.request('GET', f'/api/user-report?username={username}', headers=admin)
+    assert reply.status_code == 200
+    assert reply.json == {
+        'username': username,
+        'report': [{'date': TODAY, 'words_tried': 2, 'correct_guesses': 1}],
+        'next_cursor': None}
+
+    reply = client.request('GET', f'/api/user-report?username={username}&detail=games',
+                           headers=admin)
+    assert reply.status_code == 200
+    games = reply.json['report'][0]['games']
+    assert [g['game_id'] for g in games if g['won']] == [game['game_id']]
+
+
+def test_user_report_errors(client, admin):
+    reply = client.request('GET', '/api/user-report', headers=admin)
+    assert (reply.status_code, reply.json) == (400, {'error': 'Username required'})
+
+    reply = client.request('GET', '/api/user-report?username=nobodyatall', headers=admin)
+    assert (reply.status_code, reply.json) == (404, {'error': 'User  not found'})
+
+
+def test_guess_on_an_earlier_days_game(client, player):
+    # Unfinished games stay playable after midnight
+    _, user_id, headers = player
+    yesterday = date.fromordinal(date.today().toordinal() - 1)
+    with game_app.app.app_context():
+        game = game_app.Game(user_id=user_id, target_word='CRANE', game_date=yesterday)
+        game_app.db.session.add(game)
+        game_app.db.session.commit()
+        game_id = game.id
+
+    reply = guess(client, headers, game_id, 'CRANE')
+    assert reply.status_code == 200
+    assert reply.json['is_correct'] is True
+
+
+def test_report_etags(client, admin):
+    identity = dict(admin, **{'Accept-Encoding': 'identity'})
+    gzipped = dict(admin, **{'Accept-Encoding': 'gzip'})
+    for path in ('/api/daily-report', '/api/daily-report?date=2020-01-01',
+                 '/api/user-report?username=admin'):
+        plain = client.request('GET', path, headers=identity)
+        packed = client.request('GET', path, headers=gzipped)
+        assert plain.status_code == packed.status_code == 200
+        assert packed.headers['Content-Encoding'] == 'gzip'
+        assert packed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gz"'
+
+        for headers, etag in ((identity, plain.headers['ETag']), (gzipped, packed.headers['ETag'])):
+            reply = client.request('GET', path, headers=dict(headers, **{'If-None-Match': etag}))
+            assert reply.status_code == 304
+        # Each tag names one representation
+        reply = client.request('GET', path, headers=dict(
+            identity, **{'If-None-Match': packed.headers['ETag']}))
+        assert reply.status_code == 200
+
+
+def test_only_settled_days_are_immutable(client, admin):
+    yesterday = date.fromordinal(date.today().toordinal() - 1).isoformat()
+    cache_control = {}
+    for day in ('2020-01-01', yesterday, TODAY):
+        reply = client.request('GET', f'/api/daily-report?date={day}', headers=admin)
+        cache_control[day] = reply.headers['Cache-Control']
+    assert 'immutable' in cache_control['2020-01-01']
+    assert 'no-cache' in cache_control[yesterday]
+    assert 'no-cache' in cache_control[TODAY]
+
+
+def test_user_report_waits_for_unfinished_games(client, player, admin):
+    username, user_id, headers = player
+    old_day = date.fromordinal(date.today().toordinal() - 5)
+    with game_app.app.app_context():
+        game = game_app.Game(user_id=user_id, target_word='CRANE', game_date=old_day)
+        game_app.db.session.add(game)
+        game_app.db.session.commit()
+        game_id = game.id
+
+    yesterday = date.fromordinal(date.today().toordinal() - 1).isoformat()
+    path = f'/api/user-report?username={username}&after={yesterday}&include_archive=1'
+    before = client.request('GET', path, headers=admin)
+    assert 'no-cache' in before.headers['Cache-Control']
+
+    guess(client, headers, game_id, 'CRANE')
+    after = client.request('GET', path, headers=admin)
+    assert 'immutable' in after.headers['Cache-Control']
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert after.json['report'] == [{'date': old_day.isoformat(), 'words_tried': 1,
+                                     'correct_guesses': 1}]
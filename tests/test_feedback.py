@@ -0,0 +1,60 @@
+import random
+import string
+from collections import Counter
+
+import feedback as fb
+
+# Repeated letters in the secret, the guess or both
+TRICKY = [
+    ('ALLEE', 'EAGLE'), ('EAGLE', 'ALLEE'), ('SPEED', 'ABIDE'), ('ABIDE', 'SPEED'),
+    ('CREEP', 'EERIE'), ('EERIE', 'CREEP'), ('LLAMA', 'ALLOY'), ('ROBOT', 'FLOOR'),
+    ('ABBEY', 'BABES'), ('SASSY', 'ASSES'), ('EEEEE', 'ABCDE'), ('ABCDE', 'EEEEE'),
+]
+
+
+def legacy_feedback(secret, guess):
+    """get_feedback() as the app first shipped it: the reference rules."""
+    feedback = ['gray'] * 5
+    s_count = Counter(secret)
+    for i in range(5):
+        if guess[i] == secret[i]:
+            feedback[i] = 'green'
+            s_count[guess[i]] -= 1
+    for i in range(5):
+        if feedback[i] == 'gray' and s_count[guess[i]] > 0:
+            feedback[i] = 'orange'
+            s_count[guess[i]] -= 1
+    return feedback
+
+
+def word_pairs():
+    rng = random.Random(2)
+    # A small alphabet makes repeated letters common
+    words = [''.join(rng.choice('ABELS') for _ in range(5)) for _ in range(60)]
+    words += [''.join(rng.choice(string.ascii_uppercase) for _ in range(5)) for _ in range(60)]
+    pairs = [(secret, guess) for secret in words[:60] for guess in words[:60]]
+    pairs += [(rng.choice(words), rng.choice(words)) for _ in range(2000)]
+    return TRICKY + pairs
+
+
+def test_score_matches_legacy():
+    for secret, guess in word_pairs():
+        assert fb.pattern_labels(fb.score(secret, guess)) == legacy_feedback(secret, guess), (
+            secret, guess)
+
+
+def test_score_batch_matches_legacy():
+    pairs = word_pairs()
+    codes = fb.score_batch([s for s, _ in pairs], [g for _, g in pairs])
+    for (secret, guess), code in zip(pairs, codes.tolist()):
+        assert fb.pattern_labels(code) == legacy_feedback(secret, guess), (secret, guess)
+
+
+def test_tricky_cases():
+    expected = {
+        ('ALLEE', 'EAGLE'): ['orange', 'orange', 'gray', 'orange', 'green'],
+        ('SPEED', 'ABIDE'): ['gray', 'gray', 'gray', 'orange', 'orange'],
+    }
+    for (secret, guess), labels in expected.items():
+        assert fb.pattern_labels(fb.score(secret, guess)) == labels
+        assert fb.pattern_labels(int(fb.score_batch([secret], [guess])[0])) == labels
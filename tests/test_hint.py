@@ -0,0 +1,35 @@
+from conftest import ADMIN, PASSWORD, FlaskClient, bearer, game_app, unique_name
+
+# The hint engine is served by the Flask app only
+
+
+def login(client, credentials):
+    reply = client.request('POST', '/api/login', credentials)
+    return bearer(reply.json['token'])
+
+
+def test_hints_follow_word_imports():
+    client = FlaskClient()
+    with game_app.app.app_context():
+        game_app.get_feedback_matrix().sync(game_app.word_pool.words())
+    username = unique_name()
+    client.request('POST', '/api/register', {'username': username, 'password': PASSWORD})
+    headers = login(client, {'username': username, 'password': PASSWORD})
+    admin = login(client, ADMIN)
+
+    game_id = client.request('POST', '/api/start-game', {}, headers).json['game_id']
+    assert client.request('GET', f'/api/hint?game_id={game_id}', headers=headers).status_code == 200
+
+    # Imports score their words into the matrix
+    reply = client._client.post('/api/admin/import-words', data='GHOST\n', headers=admin)
+    assert reply.status_code == 200
+    assert 'GHOST' in game_app.get_feedback_matrix().index
+    assert client.request('GET', f'/api/hint?game_id={game_id}', headers=headers).status_code == 200
+
+    # A word added behind its back leaves the matrix stale
+    with game_app.app.app_context():
+        game_app.db.session.add(game_app.Word(word='QUIRK'))
+        game_app.db.session.commit()
+    reply = client.request('GET', f'/api/hint?game_id={game_id}', headers=headers)
+    assert (reply.status_code, reply.json) == (
+        503, {'error': 'Hints are unavailable until the feedback matrix is rebuilt'})
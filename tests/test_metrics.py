@@ -0,0 +1,22 @@
+from conftest import ADMIN, PASSWORD, FlaskClient, bearer, game_app, unique_name
+
+# Metrics are served by the Flask app only
+
+
+def test_metrics_need_admin_or_scrape_token(monkeypatch):
+    client = FlaskClient()
+    username = unique_name()
+    client.request('POST', '/api/register', {'username': username, 'password': PASSWORD})
+    player = client.request('POST', '/api/login', {'username': username, 'password': PASSWORD})
+    admin = client.request('POST', '/api/login', ADMIN)
+
+    reply = client.request('GET', '/api/metrics')
+    assert (reply.status_code, reply.json) == (401, {'error': 'Valid token required'})
+    reply = client.request('GET', '/api/metrics', headers=bearer(player.json['token']))
+    assert (reply.status_code, reply.json) == (403, {'error': 'Forbidden'})
+    assert client.request('GET', '/api/metrics',
+                          headers=bearer(admin.json['token'])).status_code == 200
+
+    monkeypatch.setitem(game_app.app.config, 'METRICS_TOKEN', 'scrape-secret')
+    assert client.request('GET', '/api/metrics', headers=bearer('scrape-secret')).status_code == 200
+    assert client.request('GET', '/api/metrics', headers=bearer('guess')).status_code == 401
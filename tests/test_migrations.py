@@ -0,0 +1,81 @@
+import calendar
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+
+import feedback as fb
+import migrations
+from word_pool import encode_word
+
+# The tables as the app first created them, at the last version before
+# guesses were compacted
+BASELINE = [
+    "CREATE TABLE word (id INTEGER NOT NULL PRIMARY KEY, word VARCHAR(5) NOT NULL UNIQUE, "
+    "created_at DATETIME)",
+    "CREATE TABLE game (id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER NOT NULL, "
+    "target_word VARCHAR(5) NOT NULL, game_date DATE, won BOOLEAN, "
+    "guesses_used INTEGER NOT NULL DEFAULT 0, completed BOOLEAN NOT NULL DEFAULT 0)",
+    "CREATE TABLE guess (id INTEGER NOT NULL PRIMARY KEY, game_id INTEGER NOT NULL, "
+    "guess_word VARCHAR(5) NOT NULL, feedback VARCHAR(5) NOT NULL, "
+    "guess_number INTEGER NOT NULL, created_at DATETIME)",
+    "CREATE INDEX ix_guess_game_number ON guess (game_id, guess_number)",
+    "CREATE TABLE word_stats_state (id INTEGER NOT NULL PRIMARY KEY, "
+    "high_water_game_id INTEGER NOT NULL)",
+    "PRAGMA user_version = 6",
+]
+
+INSERT_GUESS = text(
+    "INSERT INTO guess (game_id, guess_word, feedback, guess_number, created_at) "
+    "VALUES (:game_id, :word, :feedback, :number, :created_at)")
+
+
+def baseline(tmp_path, rows):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        for statement in BASELINE:
+            conn.execute(text(statement))
+        conn.execute(INSERT_GUESS, rows)
+    return engine
+
+
+def test_compact_guess_storage_converts_rows(tmp_path):
+    rows = [
+        {'game_id': 1, 'word': 'CRANE', 'feedback': 'GYOYY', 'number': 1,
+         'created_at': '2024-05-01 12:00:00'},
+        {'game_id': 1, 'word': 'SLOTH', 'feedback': 'GGGGG', 'number': 2,
+         'created_at': '2024-05-01 12:00:30'},
+        {'game_id': 2, 'word': 'ZZZZZ', 'feedback': 'YYYYY', 'number': 1, 'created_at': None},
+    ]
+    engine = baseline(tmp_path, rows)
+    assert 7 in migrations.run_migrations(engine)
+
+    with engine.connect() as conn:
+        converted = conn.execute(text(
+            "SELECT game_id, guess_number, guess_code, feedback_code, created_at "
+            "FROM guess ORDER BY game_id, guess_number")).all()
+        legacy = conn.execute(text("SELECT COUNT(*) FROM guess_legacy")).scalar()
+    noon = calendar.timegm((2024, 5, 1, 12, 0, 0))
+    assert [tuple(row) for row in converted] == [
+        (1, 1, encode_word('CRANE'), fb.pattern_from_string('GYOYY'), noon),
+        (1, 2, encode_word('SLOTH'), fb.pattern_from_string('GGGGG'), noon + 30),
+        (2, 1, encode_word('ZZZZZ'), fb.pattern_from_string('YYYYY'), None),
+    ]
+    assert legacy == len(rows)
+
+
+def test_compact_guess_storage_refuses_duplicates(tmp_path):
+    row = {'game_id': 1, 'word': 'CRANE', 'feedback': 'GYOYY', 'number': 1,
+           'created_at': '2024-05-01 12:00:00'}
+    engine = baseline(tmp_path, [row, dict(row, word='SLOTH')])
+    with pytest.raises(IntegrityError):
+        migrations.run_migrations(engine)
+
+    # Rolled back whole: the old table and its index are untouched
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == 6
+        assert 'guess_word' in migrations._columns(conn, 'guess')
+        assert conn.execute(text("SELECT COUNT(*) FROM guess")).scalar() == 2
+        names = conn.execute(text("SELECT name FROM sqlite_master")).scalars().all()
+    assert 'ix_guess_game_number' in names
+    assert 'guess_compact' not in names
@@ -0,0 +1,111 @@
+import threading
+from datetime import date
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+import quota
+from conftest import PASSWORD, bearer, game_app, unique_name
+
+THREADS = 16
+
+
+def run_together(target, count=THREADS):
+    """Run ``target(i)`` on ``count`` threads released at the same moment."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+    errors = []
+
+    def worker(i):
+        try:
+            barrier.wait()
+            results[i] = target(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    return results
+
+
+def engine():
+    with game_app.app.app_context():
+        return game_app.db.engine
+
+
+def test_reserve_has_no_lost_updates():
+    # A made-up user id; daily_quota has no foreign key
+    user_id, day, per_thread = 10 ** 6, date.today(), 25
+    bind = engine()
+
+    def reserve_many(_):
+        numbers = []
+        for _ in range(per_thread):
+            # Its own connection each time, like separate requests or workers
+            with Session(bind) as session:
+                numbers.append(quota.reserve(session, user_id, day, limit=10 ** 6))
+                session.commit()
+        return numbers
+
+    numbers = [n for batch in run_together(reserve_many) for n in batch]
+    total = THREADS * per_thread
+    assert sorted(numbers) == list(range(1, total + 1))
+    with Session(bind) as session:
+        assert quota.used(session, user_id, day) == total
+
+
+def test_reserve_never_exceeds_limit():
+    user_id, day = 10 ** 6 + 1, date.today()
+    bind = engine()
+
+    def reserve_once(_):
+        with Session(bind) as session:
+            number = quota.reserve(session, user_id, day)
+            session.commit()
+            return number
+
+    numbers = run_together(reserve_once)
+    assert sorted(n for n in numbers if n is not None) == [1, 2, 3]
+    assert numbers.count(None) == THREADS - quota.DAILY_GAME_LIMIT
+
+
+def register(client):
+    username = unique_name()
+    client.request('POST', '/api/register', {'username': username, 'password': PASSWORD})
+    reply = client.request('POST', '/api/login', {'username': username, 'password': PASSWORD})
+    return reply.json['user_id'], bearer(reply.json['token'])
+
+
+def test_concurrent_start_game(client, admin):
+    players = [register(client) for _ in range(4)]
+    tries = 4  # per player, one more than the limit
+    before = client.request('GET', '/api/daily-report', headers=admin).json
+
+    replies = run_together(
+        lambda i: client.request('POST', '/api/start-game', {}, players[i % len(players)][1]),
+        count=len(players) * tries)
+
+    started = [r for r in replies if r.status_code == 200]
+    refused = [r for r in replies if r.status_code != 200]
+    assert len(started) == len(players) * quota.DAILY_GAME_LIMIT
+    assert {(r.status_code, r.json['error']) for r in refused} == {
+        (400, 'Daily limit reached (3 games per day)')}
+    assert len({r.json['game_id'] for r in started}) == len(started)
+
+    for user_id, headers in players:
+        reply = client.request('GET', '/api/game-status', headers=headers)
+        assert reply.json == {'games_played_today': 3, 'games_remaining': 0}
+    count_games = text("SELECT COUNT(*) FROM game WHERE user_id IN :ids").bindparams(
+        bindparam('ids', expanding=True))
+    with Session(engine()) as session:
+        games = session.execute(count_games, {'ids': [user_id for user_id, _ in players]}).scalar()
+    assert games == len(started)
+
+    # The daily_stats row takes every increment too
+    after = client.request('GET', '/api/daily-report', headers=admin).json
+    assert after['games_played'] == before['games_played'] + len(started)
+    assert after['num_users'] == before['num_users'] + len(players)
@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+import word_stats
+from conftest import game_app
+
+
+def engine():
+    with game_app.app.app_context():
+        return game_app.db.engine
+
+
+def counts(bind, word):
+    with bind.connect() as conn:
+        row = conn.execute(text(
+            "SELECT games_completed, games_won FROM word_stats WHERE word = :word"),
+            {'word': word}).first()
+    return tuple(row) if row else (0, 0)
+
+
+def test_game_finished_after_its_day_is_counted(client, player):
+    _, user_id, headers = player
+    bind = engine()
+    with game_app.app.app_context():
+        game = game_app.Game(user_id=user_id, target_word='CRANE', game_date=date.today())
+        game_app.db.session.add(game)
+        game_app.db.session.commit()
+        game_id = game.id
+
+    # Once the day is over the mark passes the unfinished game
+    tomorrow = date.today() + timedelta(days=1)
+    summary = word_stats.refresh(bind, workers=0, today=tomorrow)
+    assert summary['to_game_id'] >= game_id
+    before = counts(bind, 'CRANE')
+
+    reply = client.request('POST', '/api/submit-guess', {'game_id': game_id, 'guess_word': 'CRANE'},
+                           headers)
+    assert reply.json['is_correct'] is True
+
+    summary = word_stats.refresh(bind, workers=0, today=tomorrow)
+    assert summary['late_games'] == 1
+    assert counts(bind, 'CRANE') == (before[0] + 1, before[1] + 1)
+
+    # Counted once only
+    word_stats.refresh(bind, workers=0, today=tomorrow)
+    assert counts(bind, 'CRANE') == (before[0] + 1, before[1] + 1)
@@ -0,0 +1,57 @@
+import base64
+import hashlib
+import hmac
+import time
+from collections import namedtuple
+
+Claims = namedtuple('Claims', ['user_id', 'role', 'expires'])
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(secret, payload):
+    return hmac.new(secret, payload, hashlib.sha256).digest()
+
+
+def issue_token(secret, user_id, role, ttl_seconds):
+    """Return a compact ``payload.signature`` token for the given claims.
+
+    The payload is ``user_id:role:expiry`` in plain ASCII, so verifying a
+    token needs one HMAC and no database access.
+    """
+    expires = int(time.time()) + int(ttl_seconds)
+    payload = f'{int(user_id)}:{role}:{expires}'.encode('ascii')
+    return _b64encode(payload) + '.' + _b64encode(_sign(secret, payload)), expires
+
+
+def verify_token(secret, token):
+    """Return the token's Claims, or raise InvalidToken."""
+    try:
+        payload_part, sig_part = token.split('.')
+        payload = _b64decode(payload_part)
+        signature = _b64decode(sig_part)
+    except (ValueError, TypeError):
+        raise InvalidToken('Malformed token')
+
+    if not hmac.compare_digest(signature, _sign(secret, payload)):
+        raise InvalidToken('Bad signature')
+
+    try:
+        user_id, role, expires = payload.decode('ascii').split(':')
+        claims = Claims(int(user_id), role, int(expires))
+    except ValueError:
+        raise InvalidToken('Malformed token')
+
+    if claims.expires < time.time():
+        raise InvalidToken('Token expired')
+    return claims
@@ -0,0 +1,84 @@
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+
+from guess_dictionary import is_word_shape
+
+DEFAULT_CHUNK_SIZE = 5000
+
+INSERT_WORD_SQL = text(
+    "INSERT OR IGNORE INTO word (word, created_at) VALUES (:word, CURRENT_TIMESTAMP)"
+)
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    inserted: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.read / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            'read': self.read,
+            'inserted': self.inserted,
+            'invalid': self.invalid,
+            'duplicates': self.duplicates,
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def iter_word_chunks(lines, chunk_size, stats):
+    """Yield de-duplicated chunks of normalized words from ``lines``.
+
+    Only one chunk is held at a time, so memory stays bounded by
+    ``chunk_size`` no matter how long the input is.
+    """
+    chunk = set()
+    for line in lines:
+        stats.read += 1
+        word = line.strip().upper()
+        if not is_word_shape(word):
+            stats.invalid += 1
+            continue
+        if word in chunk:
+            stats.duplicates += 1
+            continue
+        chunk.add(word)
+        if len(chunk) >= chunk_size:
+            yield sorted(chunk)
+            chunk = set()
+    if chunk:
+        yield sorted(chunk)
+
+
+def import_words(session, lines, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Stream answer words into the ``word`` table.
+
+    Each chunk is one executemany of ``INSERT OR IGNORE`` committed on its
+    own; words already present are skipped by the unique constraint on
+    ``word.word``. ``progress`` is called with the running stats after each
+    chunk.
+    """
+    stats = ImportStats()
+    for chunk in iter_word_chunks(lines, chunk_size, stats):
+        result = session.execute(INSERT_WORD_SQL, [{'word': w} for w in chunk])
+        session.commit()
+        inserted = result.rowcount
+        stats.inserted += inserted
+        stats.duplicates += len(chunk) - inserted
+        if progress is not None:
+            progress(stats)
+    return stats
@@ -0,0 +1,113 @@
+from array import array
+from bisect import bisect_left
+import random
+import threading
+import time
+
+WORD_LENGTH = 5
+ALPHABET_SIZE = 26
+
+# Bumped by triggers in the same transaction as any change to ``word``, so
+# every process, not just the one that wrote, can tell its pool is stale
+VERSION_DDL = [
+    "CREATE TABLE IF NOT EXISTS word_version ("
+    "id INTEGER NOT NULL PRIMARY KEY CHECK (id = 1), "
+    "version INTEGER NOT NULL DEFAULT 0)",
+    "INSERT OR IGNORE INTO word_version (id, version) VALUES (1, 0)",
+] + [
+    f"CREATE TRIGGER IF NOT EXISTS word_version_{op.lower()} AFTER {op} ON word "
+    "BEGIN UPDATE word_version SET version = version + 1 WHERE id = 1; END"
+    for op in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+VERSION_SQL = "SELECT version FROM word_version WHERE id = 1"
+
+
+def encode_word(word):
+    """Pack a 5-letter A-Z word into a base-26 integer (fits in 24 bits)."""
+    code = 0
+    for ch in word:
+        code = code * ALPHABET_SIZE + (ord(ch) - 65)
+    return code
+
+
+def decode_word(code):
+    """Inverse of encode_word."""
+    letters = []
+    for _ in range(WORD_LENGTH):
+        code, rem = divmod(code, ALPHABET_SIZE)
+        letters.append(chr(rem + 65))
+    return ''.join(reversed(letters))
+
+
+class WordPool:
+    """In-process cache of the answer words.
+
+    Words are held as sorted base-26 codes in a flat ``array``, so a random
+    pick is a single index lookup and membership is a binary search.
+
+    ``version_loader`` reads the database's word version (``VERSION_SQL``).
+    It is read at most once every ``check_interval`` seconds, and when it
+    has moved the pool reloads through ``loader``. That way a word import
+    in any process reaches every worker. ``generation`` is the version of
+    the words currently loaded. ``invalidate()`` forces a check on the next
+    use in this process.
+    """
+
+    def __init__(self, loader, version_loader=None, check_interval=1.0):
+        self._loader = loader
+        self._version_loader = version_loader
+        self.check_interval = check_interval
+        self._codes = array('I')
+        self._lock = threading.Lock()
+        self._local_version = 0
+        self._checked_at = None
+        self.generation = None
+
+    def invalidate(self):
+        with self._lock:
+            self._local_version += 1
+            self._checked_at = None
+
+    def warm(self):
+        with self._lock:
+            self._refresh(time.monotonic())
+
+    def _refresh(self, now):
+        # Version first: words loaded after it are at least that new
+        version = self._version_loader() if self._version_loader else self._local_version
+        if version != self.generation:
+            self._codes = array('I', sorted(encode_word(w) for w in self._loader()))
+            self.generation = version
+        self._checked_at = now
+
+    def _due(self, now):
+        return self._checked_at is None or now - self._checked_at >= self.check_interval
+
+    def _current(self):
+        now = time.monotonic()
+        if self._due(now):
+            with self._lock:
+                if self._due(now):
+                    self._refresh(now)
+        return self._codes
+
+    def __contains__(self, word):
+        if len(word) != WORD_LENGTH or not (word.isascii() and word.isalpha() and word.isupper()):
+            return False
+        codes = self._current()
+        code = encode_word(word)
+        i = bisect_left(codes, code)
+        return i < len(codes) and codes[i] == code
+
+    def __len__(self):
+        return len(self._current())
+
+    def words(self):
+        return [decode_word(c) for c in self._current()]
+
+    def random_word(self):
+        codes = self._current()
+        if not codes:
+            return None
+        return decode_word(codes[random.randrange(len(codes))])
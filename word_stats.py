@@ -0,0 +1,297 @@
+"""Per-word difficulty analytics, built by an incremental batch job.
+
+``refresh`` scans finished games past a high-water mark on ``game.id``.
+The id range is split into chunks. Each chunk is streamed from the
+database in a process-pool worker, which turns it into a small partial
+aggregate. The main process merges the partials and adds them to the
+``word_stats`` and ``word_first_guess`` tables. It also advances the mark,
+all in one transaction, so an interrupted run leaves nothing half-applied
+and the next run picks up where the last one committed.
+
+The scan stops just before the oldest game still in progress today, so the
+mark passes unfinished games from earlier days, which count for nothing
+then. Such a game can still be finished later. A trigger on ``game`` queues
+any game finished at or below the mark in ``word_stats_late``, and the next
+refresh counts it and empties the queue. Games passed unfinished that are
+finished while a refresh runs are queued by that refresh itself, while it
+holds the write lock.
+"""
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.pool import NullPool
+
+import archive
+from word_pool import decode_word
+
+DEFAULT_CHUNK_SIZE = 20000
+TOP_FIRST_GUESSES = 3
+
+CREATE_SQL = [
+    text("CREATE TABLE IF NOT EXISTS word_stats ("
+         "word VARCHAR(5) NOT NULL PRIMARY KEY, "
+         "games_completed INTEGER NOT NULL DEFAULT 0, "
+         "games_won INTEGER NOT NULL DEFAULT 0, "
+         "solve_guesses INTEGER NOT NULL DEFAULT 0)"),
+    text("CREATE TABLE IF NOT EXISTS word_first_guess ("
+         "word VARCHAR(5) NOT NULL, "
+         "first_guess VARCHAR(5) NOT NULL, "
+         "times INTEGER NOT NULL DEFAULT 0, "
+         "PRIMARY KEY (word, first_guess))"),
+    text("CREATE TABLE IF NOT EXISTS word_stats_state ("
+         "id INTEGER NOT NULL PRIMARY KEY CHECK (id = 1), "
+         "high_water_game_id INTEGER NOT NULL DEFAULT 0, "
+         "updated_at DATETIME)"),
+]
+
+# Games finished after the mark passed them, queued by the trigger
+LATE_DDL = [
+    "CREATE TABLE IF NOT EXISTS word_stats_late (game_id INTEGER NOT NULL PRIMARY KEY)",
+    "CREATE TRIGGER IF NOT EXISTS word_stats_late_finish "
+    "AFTER UPDATE OF won, completed ON game "
+    "WHEN (NEW.won OR NEW.completed) AND NOT (OLD.won OR OLD.completed) "
+    "AND NEW.id <= (SELECT high_water_game_id FROM word_stats_state WHERE id = 1) "
+    "BEGIN INSERT OR IGNORE INTO word_stats_late (game_id) VALUES (NEW.id); END",
+]
+
+_GAME_COLUMNS = (
+    "SELECT game.id, game.target_word, game.won, game.completed, game.guesses_used, "
+    "guess.guess_code "
+    "FROM game LEFT JOIN guess ON guess.game_id = game.id AND guess.guess_number = 1 ")
+
+_CHUNK_SQL = text(_GAME_COLUMNS + "WHERE game.id > :low AND game.id <= :high")
+
+_GAMES_BY_ID_SQL = text(_GAME_COLUMNS + "WHERE game.id IN :ids").bindparams(
+    bindparam('ids', expanding=True))
+
+_LATE_IDS_SQL = text("SELECT game_id FROM word_stats_late ORDER BY game_id")
+
+_DELETE_LATE_SQL = text("DELETE FROM word_stats_late WHERE game_id IN :ids").bindparams(
+    bindparam('ids', expanding=True))
+
+_FINISHED_SINCE_SQL = text(
+    "SELECT id FROM game WHERE id IN :ids AND (won OR completed)").bindparams(
+    bindparam('ids', expanding=True))
+
+_QUEUE_LATE_SQL = text("INSERT OR IGNORE INTO word_stats_late (game_id) VALUES (:game_id)")
+
+_FRONTIER_SQL = text(
+    "SELECT MIN(id) FROM game "
+    "WHERE id > :mark AND completed = 0 AND game_date >= :today")
+
+_UPSERT_STATS_SQL = text(
+    "INSERT INTO word_stats (word, games_completed, games_won, solve_guesses) "
+    "VALUES (:word, :games_completed, :games_won, :solve_guesses) "
+    "ON CONFLICT(word) DO UPDATE SET "
+    "games_completed = games_completed + excluded.games_completed, "
+    "games_won = games_won + excluded.games_won, "
+    "solve_guesses = solve_guesses + excluded.solve_guesses")
+
+_UPSERT_FIRST_GUESS_SQL = text(
+    "INSERT INTO word_first_guess (word, first_guess, times) "
+    "VALUES (:word, :first_guess, :times) "
+    "ON CONFLICT(word, first_guess) DO UPDATE SET times = times + excluded.times")
+
+_SET_MARK_SQL = text(
+    "INSERT INTO word_stats_state (id, high_water_game_id, updated_at) "
+    "VALUES (1, :mark, CURRENT_TIMESTAMP) "
+    "ON CONFLICT(id) DO UPDATE SET high_water_game_id = excluded.high_water_game_id, "
+    "updated_at = excluded.updated_at")
+
+
+class Partial:
+    """Mergeable aggregate for a slice of games."""
+
+    def __init__(self):
+        # word -> [games_completed, games_won, solve_guesses]
+        self.words = {}
+        self.first_guesses = Counter()
+        self.games = 0
+        # Ids passed while unfinished; they may still be finished later
+        self.unfinished = []
+
+    def add(self, game_id, target_word, won, completed, guesses_used, first_guess_code):
+        self.games += 1
+        if not (won or completed):
+            self.unfinished.append(game_id)
+            return
+        totals = self.words.setdefault(target_word, [0, 0, 0])
+        totals[0] += 1
+        if won:
+            totals[1] += 1
+            totals[2] += guesses_used or 1
+        if first_guess_code is not None:
+            self.first_guesses[(target_word, first_guess_code)] += 1
+
+    def merge(self, other):
+        for word, (completed, won, guesses) in other.words.items():
+            totals = self.words.setdefault(word, [0, 0, 0])
+            totals[0] += completed
+            totals[1] += won
+            totals[2] += guesses
+        self.first_guesses.update(other.first_guesses)
+        self.games += other.games
+        self.unfinished.extend(other.unfinished)
+        return self
+
+
+_worker_engines = {}
+
+
+def aggregate_range(database_url, low, high, fetch_size=DEFAULT_CHUNK_SIZE // 4):
+    """Stream games with ``low < id <= high`` and aggregate them.
+
+    Runs in a pool worker with its own engine; rows come off a streaming
+    cursor ``fetch_size`` at a time rather than being materialized.
+    """
+    engine = _worker_engines.get(database_url)
+    if engine is None:
+        engine = _worker_engines[database_url] = create_engine(database_url, poolclass=NullPool)
+    partial = Partial()
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=fetch_size).execute(
+            _CHUNK_SQL, {'low': low, 'high': high})
+        for rows in result.partitions():
+            for row in rows:
+                partial.add(*row)
+    return partial
+
+
+def high_water_mark(conn):
+    mark = conn.execute(text("SELECT high_water_game_id FROM word_stats_state WHERE id = 1")).scalar()
+    return mark or 0
+
+
+def _scan_bounds(conn, today):
+    mark = high_water_mark(conn)
+    frontier = conn.execute(_FRONTIER_SQL, {'mark': mark, 'today': today.isoformat()}).scalar()
+    if frontier is not None:
+        return mark, frontier - 1
+    return mark, conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM game")).scalar()
+
+
+def _chunks(ids, size=500):
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def _aggregate_late(conn, late_ids):
+    partial = Partial()
+    for ids in _chunks(late_ids):
+        for row in conn.execute(_GAMES_BY_ID_SQL, {'ids': ids}):
+            partial.add(*row)
+    return partial
+
+
+def _apply(conn, partial, mark, late_ids):
+    if partial.words:
+        conn.execute(_UPSERT_STATS_SQL, [
+            {'word': word, 'games_completed': c, 'games_won': w, 'solve_guesses': g}
+            for word, (c, w, g) in partial.words.items()])
+    if partial.first_guesses:
+        conn.execute(_UPSERT_FIRST_GUESS_SQL, [
+            {'word': word, 'first_guess': decode_word(guess_code), 'times': n}
+            for (word, guess_code), n in partial.first_guesses.items()])
+    conn.execute(_SET_MARK_SQL, {'mark': mark})
+    for ids in _chunks(late_ids):
+        conn.execute(_DELETE_LATE_SQL, {'ids': ids})
+    # This transaction holds the write lock now, so nothing can finish a
+    # game between this check and the new mark becoming visible
+    for ids in _chunks(partial.unfinished):
+        finished = conn.execute(_FINISHED_SINCE_SQL, {'ids': ids}).scalars().all()
+        if finished:
+            conn.execute(_QUEUE_LATE_SQL, [{'game_id': game_id} for game_id in finished])
+
+
+def refresh(engine, workers=2, chunk_size=DEFAULT_CHUNK_SIZE, full=False, today=None):
+    """Aggregate finished games past the high-water mark.
+
+    Games queued in ``word_stats_late`` are counted too. Returns
+    ``{'games_scanned', 'late_games', 'from_game_id', 'to_game_id'}``. With
+    ``full=True`` the tables are cleared first and every game is rescanned;
+    that raises ValueError once games have been archived, since their
+    counts could not be recovered. ``workers=0`` aggregates in this process.
+    """
+    today = today or date.today()
+    with engine.begin() as conn:
+        if full and archive.horizon(conn) is not None:
+            raise ValueError('Games have been archived; a full rescan would lose their counts')
+        if full:
+            conn.execute(text("DELETE FROM word_stats"))
+            conn.execute(text("DELETE FROM word_first_guess"))
+            conn.execute(text("DELETE FROM word_stats_state"))
+            conn.execute(text("DELETE FROM word_stats_late"))
+        low, high = _scan_bounds(conn, today)
+        late_ids = conn.execute(_LATE_IDS_SQL).scalars().all()
+        total = _aggregate_late(conn, late_ids)
+
+    summary = {'games_scanned': 0, 'late_games': 0, 'from_game_id': low, 'to_game_id': low}
+    if high <= low and not late_ids:
+        return summary
+
+    url = engine.url.render_as_string(hide_password=False)
+    ranges = [(start, min(start + chunk_size, high)) for start in range(low, high, chunk_size)]
+    if workers and ranges:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            for partial in pool.map(aggregate_range, [url] * len(ranges),
+                                    *zip(*ranges)):
+                total.merge(partial)
+    else:
+        for start, end in ranges:
+            total.merge(aggregate_range(url, start, end))
+
+    with engine.begin() as conn:
+        # Another refresh may have committed meanwhile; only apply on top of
+        # the mark this run started from
+        if high_water_mark(conn) != low:
+            return summary
+        _apply(conn, total, high, late_ids)
+
+    summary.update(games_scanned=total.games, late_games=len(late_ids), to_game_id=high)
+    return summary
+
+
+def report(conn, sort='games', descending=True, limit=50, word=None):
+    """Per-word rows plus the overall most common first guesses."""
+    order = {
+        'games': 'games_completed',
+        'win_rate': 'CAST(games_won AS REAL) / games_completed',
+        'avg_guesses': 'CAST(solve_guesses AS REAL) / NULLIF(games_won, 0)',
+        'word': 'word',
+    }[sort]
+    direction = 'DESC' if descending else 'ASC'
+    where = "WHERE games_completed > 0" + (" AND word = :word" if word else "")
+    rows = conn.execute(text(
+        "SELECT word, games_completed, games_won, solve_guesses FROM word_stats "
+        f"{where} ORDER BY {order} {direction}, word LIMIT :limit"),
+        {'word': word, 'limit': limit}).all()
+
+    firsts = {}
+    if rows:
+        params = {f'w{i}': row.word for i, row in enumerate(rows)}
+        placeholders = ', '.join(f':{name}' for name in params)
+        for w, guess, times in conn.execute(text(
+                "SELECT word, first_guess, times FROM word_first_guess "
+                f"WHERE word IN ({placeholders}) ORDER BY word, times DESC, first_guess"), params):
+            top = firsts.setdefault(w, [])
+            if len(top) < TOP_FIRST_GUESSES:
+                top.append({'guess': guess, 'times': times})
+
+    overall = conn.execute(text(
+        "SELECT first_guess, SUM(times) AS total FROM word_first_guess "
+        "GROUP BY first_guess ORDER BY total DESC, first_guess LIMIT 10")).all()
+
+    return {
+        'high_water_game_id': high_water_mark(conn),
+        'words': [{
+            'word': row.word,
+            'games_completed': row.games_completed,
+            'games_won': row.games_won,
+            'win_rate': round(row.games_won / row.games_completed, 4),
+            'avg_guesses_to_solve': (round(row.solve_guesses / row.games_won, 2)
+                                     if row.games_won else None),
+            'top_first_guesses': firsts.get(row.word, [])
+        } for row in rows],
+        'top_first_guesses': [{'guess': guess, 'times': total} for guess, total in overall]
+    }